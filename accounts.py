@@ -0,0 +1,233 @@
+import threading
+import time
+
+from sheet_sync import appended_at, col_letter, is_retryable
+
+# Username-keyed view of the `users` tab, shared by every session. The tab is
+# downloaded once; after that only new rows and the status column are re-read,
+# so a login is a dict lookup instead of a full get_all_records() scan.
+
+USER_HEADER = ['username', 'password', 'name', 'date', 'status']
+
+
+class UserDirectory:
+    def __init__(self, ttl=60, min_refresh=5):
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.lock = threading.RLock()
+        self.header = None
+        self.users = {}  # username -> record dict
+        self.rows = {}   # username -> sheet row, None while the append is still queued
+        self.n_rows = 0
+        self.checked_at = 0.0
+
+    def _record(self, row):
+        row = [str(v) for v in row] + [''] * (len(self.header) - len(row))
+        return dict(zip(self.header, row))
+
+    def _index(self, row_no, row):
+        rec = self._record(row)
+        name = rec.get('username', '')
+        if name and (name not in self.users or self.rows.get(name) is None):
+            self.users[name] = rec
+            self.rows[name] = row_no
+
+    def _load(self, sheet):
+        vals = sheet.get_all_values()
+        queued = {n: u for n, u in self.users.items() if self.rows.get(n) is None}  # registered before the first read
+        self.header = [h for h in vals[0] if h] if vals else list(USER_HEADER)
+        self.users, self.rows = {}, {}
+        for i, row in enumerate(vals[1:], start=2): self._index(i, row)
+        for n, u in queued.items():
+            if n not in self.users: self.users[n], self.rows[n] = u, None
+        self.n_rows = max(len(vals), 1)
+        self.checked_at = time.monotonic()
+
+    def _tail(self, sheet, end):
+        # Rows up to `end` that other processes appended since we last looked
+        for i, row in enumerate(sheet.get(f"A{self.n_rows + 1}:{col_letter(len(self.header))}{end}"), start=self.n_rows + 1): self._index(i, row)
+        self.n_rows = end
+
+    def _refresh(self, sheet):
+        # New rows from other processes plus approvals made directly in the sheet
+        last = col_letter(len(self.header))
+        ranges = [f"A{self.n_rows + 1}:{last}"]
+        if 'status' in self.header and self.n_rows > 1:
+            sc = col_letter(self.header.index('status') + 1)
+            ranges.append(f"{sc}2:{sc}{self.n_rows}")
+        blocks = sheet.batch_get(ranges)
+        if len(blocks) > 1:
+            by_row = {r: n for n, r in self.rows.items() if r}
+            for i, cell in enumerate(blocks[1], start=2):
+                if i in by_row: self.users[by_row[i]]['status'] = cell[0] if cell else ''
+        for i, row in enumerate(blocks[0], start=self.n_rows + 1): self._index(i, row)
+        self.n_rows += len(blocks[0])
+        self.checked_at = time.monotonic()
+
+    def lookup(self, sheet, username):
+        with self.lock:
+            age = time.monotonic() - self.checked_at
+            if self.header is None: self._load(sheet)
+            elif age >= self.ttl: self._refresh(sheet)
+            elif username not in self.users and age >= self.min_refresh:
+                # Might have registered through another server process
+                self._refresh(sheet)
+            return self.users.get(username)
+
+    def add_pending(self, row):
+        # Before the tab was first read the record uses USER_HEADER; _load() keeps it
+        with self.lock:
+            header = self.header or USER_HEADER
+            rec = dict(zip(header, [str(v) for v in row] + [''] * (len(header) - len(row))))
+            self.users[rec['username']] = rec
+            self.rows[rec['username']] = None
+
+    def append(self, sheet, rows):
+        # Flush target for queued registrations
+        try:
+            resp = sheet.append_rows(rows)
+        except Exception as e:
+            if not is_retryable(e):
+                with self.lock:
+                    for row in rows:
+                        if self.rows.get(row[0], 0) is None:
+                            self.users.pop(row[0], None)
+                            self.rows.pop(row[0], None)
+            raise
+        with self.lock:
+            if self.header is None: return  # the first read will index these rows
+            start = appended_at(resp) or self.n_rows + 1
+            if start > self.n_rows + 1: self._tail(sheet, start - 1)
+            for i, row in enumerate(rows): self.rows[row[0]] = start + i
+            self.n_rows = max(self.n_rows, start + len(rows) - 1)
+
+    def pending(self, sheet):
+        with self.lock:
+            if self.header is None: self._load(sheet)
+            return [dict(u) for u in self.users.values() if u.get('status', '').lower().strip() != 'approved']
+
+    def approve(self, sheet, usernames):
+        # One batched write for any number of approvals; names whose row is
+        # still queued (or not in the sheet) are skipped
+        with self.lock:
+            if self.header is None: self._load(sheet)
+            elif not all(self.rows.get(u) for u in usernames): self._refresh(sheet)
+            sc = col_letter(self.header.index('status') + 1)
+            todo = [u for u in usernames if self.rows.get(u)]
+            if todo:
+                sheet.batch_update([{'range': f"{sc}{self.rows[u]}", 'values': [['approved']]} for u in todo])
+                for u in todo: self.users[u]['status'] = 'approved'
+            return todo
+
+
+# --- Latest profile per user ---
+# `profiles` is an append-only history. The view keeps each user's rows
+# sorted by date (same-day rows in sheet order), so the current profile is
+# history[-1] even after older rows were imported, and only newly appended
+# rows ever need to be read again.
+
+PROFILE_HEADER = ['username', 'date', 'weight', 'height', 'age', 'gender', 'activity', 'goal']
+
+
+def numericise(value):
+    for cast in (int, float):
+        try: return cast(value)
+        except (TypeError, ValueError): pass
+    return value
+
+
+class ProfileView:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.header = None
+        self.history = {}  # username -> [record, ...] oldest date first
+        self.queued = []   # records shown before their append has been flushed
+        self.version = 0   # bumped whenever a user's latest profile may have changed
+        self.n_rows = 0
+        self.checked_at = 0.0
+
+    def _record(self, row):
+        return {h: numericise(str(v)) if str(v) != '' else '' for h, v in zip(self.header, list(row) + [''] * len(self.header))}
+
+    def _add(self, rows):
+        added = []
+        for row in rows:
+            rec = self._record(row)
+            if rec.get('username') == '': continue
+            history = self.history.setdefault(str(rec['username']), [])
+            history.append(rec)
+            # Stable, so same-day rows keep their order
+            if len(history) > 1 and str(history[-2].get('date')) > str(rec.get('date')): history.sort(key=lambda r: str(r.get('date')))
+            added.append(rec)
+        if rows: self.version += 1
+        return added
+
+    def _ensure(self, sheet):
+        if self.header is None:
+            vals = sheet.get_all_values()
+            self.header = [h for h in vals[0] if h] if vals else list(PROFILE_HEADER)
+            self._add(vals[1:])
+            self.n_rows = max(len(vals), 1)
+            self.checked_at = time.monotonic()
+        elif time.monotonic() - self.checked_at >= self.ttl:
+            self._tail(sheet)
+            self.checked_at = time.monotonic()
+
+    def _tail(self, sheet, end=None):
+        # Rows other processes appended since we last looked (up to row `end`)
+        tail = sheet.get(f"A{self.n_rows + 1}:{col_letter(len(self.header))}{end or ''}")
+        self._add(tail)
+        self.n_rows = end or self.n_rows + len(tail)
+
+    def latest(self, sheet, username):
+        with self.lock:
+            self._ensure(sheet)
+            rows = self.history.get(username)
+            return dict(rows[-1]) if rows else None
+
+    def latest_all(self, sheet):
+        # -> (version, [every user's latest record])
+        with self.lock:
+            self._ensure(sheet)
+            return self.version, [dict(rows[-1]) for rows in self.history.values() if rows]
+
+    def current_version(self, sheet):
+        with self.lock:
+            self._ensure(sheet)
+            return self.version
+
+    def user_history(self, sheet, username):
+        with self.lock:
+            self._ensure(sheet)
+            return [dict(r) for r in self.history.get(username, [])]
+
+    def add_pending(self, sheet, row):
+        with self.lock:
+            self._ensure(sheet)
+            self.queued += self._add([row])
+
+    def append(self, sheet, rows):
+        # Flush target for queued profile saves
+        try:
+            resp = sheet.append_rows(rows)
+        except Exception as e:
+            if not is_retryable(e): self._drop_queued(rows)
+            raise
+        with self.lock:
+            self._drop_queued(rows, keep=True)
+            start = appended_at(resp) or self.n_rows + 1
+            if start > self.n_rows + 1: self._tail(sheet, start - 1)
+            self.n_rows = max(self.n_rows, start + len(rows) - 1)
+
+    def _drop_queued(self, rows, keep=False):
+        with self.lock:
+            for row in rows:
+                rec = self._record(row)
+                for q in self.queued:
+                    if q == rec:
+                        self.queued.remove(q)
+                        if not keep:
+                            self.history[str(row[0])].remove(q)
+                            self.version += 1
+                        break
@@ -1,12 +1,30 @@
 import streamlit as st
 import pandas as pd
+import csv
 import datetime
+import io
+import os
+import time
 import altair as alt
 import gspread
 import random
 from google.oauth2.service_account import Credentials
+from accounts import ProfileView, UserDirectory
+from cache import TTLCache
+from catalogue import DEFAULT_EXERCISES, DEFAULT_FOODS, Catalogue, load_catalogue
+from log_store import LogStore, editor_changes
+from metrics import QUOTA_PER_MINUTE, Metrics
+from nutrition import MACROS, macro_targets, rolling_totals
+from planner import MealPlanner
+from rollups import DailyRollup, streaks, weekly, window
+from sheet_sync import LogSync, WriteBehind
+from storage import MirroredRepository, SheetsRepository, SQLiteRepository
+from targets import ACTIVITY_LEVELS, GOAL_DB, TargetTable, parse_goals, profile_target
+from throttle import Throttle
+from transfer import LOG_FIELDS, PROFILE_FIELDS, export_blocks, file_format, import_stream, spool, validate_log, validate_profiles
 
 # --- 1. CONFIGURATION ---
+RUN_STARTED = time.perf_counter()
 st.set_page_config(
     page_title="NutriTrack Pro", 
     layout="wide", 
@@ -25,6 +43,10 @@ st.markdown("""
 # --- 2. GOOGLE SHEETS CONNECTION ---
 @st.cache_resource
 def connect_to_google():
+    if os.environ.get("NUTRITRACK_FAKE_SHEETS"):
+        # Offline mode: an in-memory stand-in for the spreadsheet (see fake_sheets.py)
+        from fake_sheets import demo_client
+        return demo_client(users=[("demo", "demo", "Demo User")])
     try:
         if "service_account" in st.secrets:
             key_dict = dict(st.secrets["service_account"])
@@ -41,83 +63,139 @@ def connect_to_google():
         return None
 
 # --- 3. DATABASE HELPERS ---
-def get_tab(client, tab_name):
+LOG_WINDOW_DAYS = 30 # Days of log history loaded into the session at login
+HANDLE_TTL = 3600 # Spreadsheet/worksheet handles rarely change
+
+@st.cache_resource
+def get_cache():
+    return TTLCache(maxsize=256)
+
+def get_tab(client, tab_name, create_cols=None):
+    # Handles are shared by all sessions, keyed per client so test fakes don't mix.
+    # With create_cols a missing tab is added instead of failing.
+    cache = get_cache()
+    def open_tab(book):
+        try: return book.worksheet(tab_name)
+        except Exception:
+            if not create_cols: raise
+            return book.add_worksheet(tab_name, rows=1000, cols=create_cols)
     try:
-        sheet = client.open("NutriTrack_Data")
-        return sheet.worksheet(tab_name)
+        book = cache.get_or_load((id(client), "book"), lambda: client.open("NutriTrack_Data"), HANDLE_TTL)
+        return cache.get_or_load((id(client), "tab", tab_name), lambda: open_tab(book), HANDLE_TTL)
     except Exception:
         return None
 
-def check_login(username, password, client):
-    users_sheet = get_tab(client, "users")
-    if not users_sheet: return "ERROR"
-    records = users_sheet.get_all_records()
-    for user in records:
-        if str(user.get('username')) == username and str(user.get('password')) == password:
-            status = str(user.get('status', '')).lower().strip()
-            if status == 'approved':
-                return user.get('name')
-            else:
-                return "PENDING"
+@st.cache_resource
+def get_throttle():
+    # Per-minute quota, request coalescing and retries for the one shared client
+    return Throttle()
+
+@st.cache_resource
+def get_user_directory():
+    return UserDirectory()
+
+def get_repository(client):
+    # Sheets goes through the shared views and write-behind queue; unless
+    # NUTRITRACK_STORAGE=sheets, SQLite is the store and Sheets an export/import target
+    client = get_throttle().wrap(get_metrics().trace(client))
+    sheets = SheetsRepository(
+        lambda name, cols=None: get_tab(client, name, cols), get_write_queue(),
+        get_user_directory(), get_profile_view(), get_log_sync(), get_rollups()
+    ) if client else None
+    if STORAGE == "sheets": return sheets
+    local = get_local_store()
+    if not sheets: return local
+    try: local.import_once(sheets)
+    except Exception as e: print(f"Import Error: {e}")
+    return MirroredRepository(local, sheets)
+
+@st.cache_resource
+def get_local_store():
+    return SQLiteRepository(DB_PATH)
+
+def check_login(username, password, repo):
+    try: user = repo.get_user(username)
+    except Exception: return "ERROR"
+    if user and str(user.get('password')) == password:
+        status = str(user.get('status', '')).lower().strip()
+        if status == 'approved':
+            return user.get('name')
+        else:
+            return "PENDING"
     return None
 
-def register_user(username, password, name, client):
-    users_sheet = get_tab(client, "users")
-    if not users_sheet: return False, "System Error"
-    records = users_sheet.get_all_records()
-    for user in records:
-        if str(user.get('username')) == username:
+def register_user(username, password, name, repo):
+    try:
+        if repo.get_user(username):
             return False, "Username already exists."
-    users_sheet.append_row([username, password, name, str(datetime.date.today()), 'pending'])
+        repo.add_user([username, password, name, str(datetime.date.today()), 'pending'])
+    except Exception as e:
+        print(f"Register Error: {e}")
+        return False, "System Error"
     return True, "Account created! Wait for admin approval."
 
-def load_latest_profile(username, client):
-    p_sheet = get_tab(client, "profiles")
-    if not p_sheet: return None
-    all_data = p_sheet.get_all_records()
-    user_history = [row for row in all_data if str(row.get('username')) == username]
-    return user_history[-1] if user_history else None
-
-def save_profile_update(username, data, client):
-    p_sheet = get_tab(client, "profiles")
-    if p_sheet:
-        goals_str = ", ".join(data['goals'])
-        row = [
-            username, str(datetime.date.today()),
-            data['weight'], data['height'], data['age'], 
-            data['gender'], data['activity'], goals_str
-        ]
-        p_sheet.append_row(row)
-
-def sync_log_to_sheet(client, log_data, date_str):
-    if not client: return
-    sheet = get_tab(client, "Sheet1")
-    if not sheet: return
-    
+def is_admin(username):
+    try: return username in st.secrets.get("admins", [])
+    except FileNotFoundError: return False # No secrets.toml at all
+
+@st.cache_resource
+def get_profile_view():
+    return ProfileView()
+
+def save_profile_update(username, data, repo):
+    goals_str = ", ".join(data['goals'])
+    row = [
+        username, str(datetime.date.today()),
+        data['weight'], data['height'], data['age'], 
+        data['gender'], data['activity'], goals_str
+    ]
+    repo.add_profile(row)
+
+@st.cache_resource
+def get_log_sync():
+    return LogSync()
+
+def load_user_log(repo, username, days=LOG_WINDOW_DAYS):
+    # Reads only this user's rows for the last `days` days
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=days - 1)
+    store = LogStore(username, start=str(start))
     try:
-        all_vals = sheet.get_all_values()
-        if not all_vals: return
-        
-        # Filter keep old rows
-        new_rows = [row for row in all_vals if row[0] != date_str]
-        
-        # Append new logs
-        for entry in log_data:
-            if str(entry['date']) == date_str:
-                new_rows.append([
-                    str(entry['date']), 
-                    entry['name'], 
-                    str(entry['cal']), 
-                    entry['type'],
-                    str(entry.get('amount', 1)),
-                    str(entry.get('unit', ''))
-                ])
-        
-        sheet.clear()
-        sheet.update(new_rows)
-        
+        for e in repo.read_log(username, str(start), str(end)): store.add(e)
     except Exception as e:
         print(f"Sync Error: {e}")
+    return store
+
+@st.cache_resource
+def get_rollups():
+    return DailyRollup()
+
+# --- 3b. WRITE-BEHIND QUEUE ---
+@st.cache_resource
+def get_write_queue():
+    return WriteBehind()
+
+def save_changes(repo, store, changes, target=None):
+    # changes: [(before, after)] already applied to the store; only these rows are written
+    if repo and changes:
+        dates = {str((after or before)['date']) for before, after in changes}
+        repo.save_entries(store.username, changes, {d: store.totals(d) for d in dates}, target)
+
+# --- 3c. INSTRUMENTATION ---
+METRICS_FILE = os.environ.get("NUTRITRACK_METRICS_FILE") # Prometheus textfile, rewritten at most every 15 s
+
+@st.cache_resource
+def get_metrics():
+    # Every Sheets call goes through get_metrics().trace(client), see get_repository()
+    return Metrics()
+
+def record_render(page):
+    # Runs that end in st.rerun() are not recorded; the rerun that follows is
+    metrics = get_metrics()
+    metrics.observe("page", page, time.perf_counter() - RUN_STARTED)
+    if METRICS_FILE:
+        try: metrics.write(METRICS_FILE, {"handles": get_cache()})
+        except OSError as e: print(f"Metrics Error: {e}")
 
 # --- 4. SESSION STATE & CALLBACKS ---
 if 'client' not in st.session_state:
@@ -129,85 +207,56 @@ if 'logged_in' not in st.session_state:
 if 'user_profile' not in st.session_state:
     st.session_state.user_profile = {'target': 2000, 'goals': ['Maintain Current Weight']}
 if 'food_log' not in st.session_state:
-    st.session_state.food_log = []
+    st.session_state.food_log = LogStore()
 if 'generated_plan' not in st.session_state:
     st.session_state.generated_plan = {} # Changed to Dict for multiple days
 
 # --- 5. DATA ---
+# Catalogues on disk (.npy column directory or .parquet, see catalogue.py); the built-in sample menu is used when missing
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+FOOD_DB_PATH = os.environ.get("NUTRITRACK_FOOD_DB", os.path.join(DATA_DIR, "foods"))
+EXERCISE_DB_PATH = os.environ.get("NUTRITRACK_EXERCISE_DB", os.path.join(DATA_DIR, "exercises"))
+# Primary store; set NUTRITRACK_STORAGE=sheets to use Google Sheets directly instead
+STORAGE = os.environ.get("NUTRITRACK_STORAGE", "sqlite")
+DB_PATH = os.environ.get("NUTRITRACK_DB", os.path.join(DATA_DIR, "nutritrack.db"))
 
-FOOD_DB = pd.DataFrame([
-    {'name': 'Oatmeal & Berries', 'cal_per_unit': 350, 'unit': 'Bowl', 'type': 'Breakfast'},
-    {'name': 'Egg White Omelet', 'cal_per_unit': 250, 'unit': 'Serving', 'type': 'Breakfast'},
-    {'name': 'Avocado Toast', 'cal_per_unit': 400, 'unit': 'Slice', 'type': 'Breakfast'},
-    {'name': 'Greek Yogurt Parfait', 'cal_per_unit': 300, 'unit': 'Bowl', 'type': 'Breakfast'},
-    
-    {'name': 'Grilled Chicken Salad', 'cal_per_unit': 450, 'unit': 'Bowl', 'type': 'Lunch'},
-    {'name': 'Quinoa Power Bowl', 'cal_per_unit': 500, 'unit': 'Bowl', 'type': 'Lunch'},
-    {'name': 'Turkey Wrap', 'cal_per_unit': 400, 'unit': 'Wrap', 'type': 'Lunch'},
-    {'name': 'Tuna Salad', 'cal_per_unit': 350, 'unit': 'Serving', 'type': 'Lunch'},
-
-    {'name': 'Grilled Salmon', 'cal_per_unit': 600, 'unit': 'Fillet', 'type': 'Dinner'},
-    {'name': 'Lean Steak & Veg', 'cal_per_unit': 700, 'unit': 'Plate', 'type': 'Dinner'},
-    {'name': 'Veggie Stir Fry', 'cal_per_unit': 550, 'unit': 'Bowl', 'type': 'Dinner'},
-    {'name': 'Baked Cod', 'cal_per_unit': 500, 'unit': 'Fillet', 'type': 'Dinner'},
-
-    {'name': 'Protein Shake', 'cal_per_unit': 180, 'unit': 'Bottle', 'type': 'Snack'},
-    {'name': 'Almonds', 'cal_per_unit': 170, 'unit': '30g', 'type': 'Snack'},
-    {'name': 'Apple', 'cal_per_unit': 80, 'unit': 'Piece', 'type': 'Snack'},
-    {'name': 'Hummus & Carrots', 'cal_per_unit': 200, 'unit': 'Serving', 'type': 'Snack'}
-])
-
-EXERCISE_DB = pd.DataFrame([
-    {'name': 'Running (Moderate)', 'cal_per_min': 10},
-    {'name': 'Running (Fast)', 'cal_per_min': 14},
-    {'name': 'Cycling', 'cal_per_min': 8},
-    {'name': 'Swimming', 'cal_per_min': 9},
-    {'name': 'Weight Lifting', 'cal_per_min': 4},
-    {'name': 'Yoga', 'cal_per_min': 3},
-    {'name': 'HIIT', 'cal_per_min': 12},
-    {'name': 'Walking (Brisk)', 'cal_per_min': 5},
-    {'name': 'Hiking', 'cal_per_min': 6}
-])
-
-GOAL_DB = {
-    "Maintain Current Weight": 0,
-    "Lose Weight (Slow)": -250, "Lose Weight (Standard)": -500, "Lose Weight (Aggressive)": -750,
-    "Build Muscle (Lean)": 300, "Build Muscle (Bulk)": 600,
-    "Marathon Training": 800, "Triathlon Training": 700, "HIIT Performance": 450,
-    "Diabetes (Low Sugar)": -200, "Heart Health": -100, "PCOS": -250, "Pregnancy": 350
-}
-
-ACTIVITY_LEVELS = ["Sedentary (Office Job)", "Lightly Active (1-3 days)", "Moderately Active (3-5 days)", "Very Active (6-7 days)", "Athlete (2x per day)"]
-
-def calculate_target(tdee, goals):
-    if isinstance(goals, str): goals = [goals]
-    adj = sum([GOAL_DB.get(g, 0) for g in goals])
-    return max(int(tdee + adj), 1200)
-
-def calculate_bmr_tdee(weight, height, age, gender, activity):
-    bmr = (10 * weight) + (6.25 * height) - (5 * age) + 5 if gender == 'Male' else (10 * weight) + (6.25 * height) - (5 * age) - 161
-    multi = {"Sedentary": 1.2, "Lightly Active": 1.375, "Moderately Active": 1.55, "Very Active": 1.725, "Athlete": 1.9}
-    act_key = next((k for k in multi if k in activity), "Sedentary")
-    return bmr * multi[act_key]
+@st.cache_resource
+def get_target_table():
+    # Every user's target, recomputed only after a profile save or a GOAL_DB change
+    return TargetTable()
+
+@st.cache_resource
+def get_catalogues():
+    # Loaded once per server process and shared by every session
+    foods = load_catalogue(FOOD_DB_PATH) if os.path.exists(FOOD_DB_PATH) else Catalogue.from_records(DEFAULT_FOODS)
+    exercises = load_catalogue(EXERCISE_DB_PATH) if os.path.exists(EXERCISE_DB_PATH) else Catalogue.from_records(DEFAULT_EXERCISES)
+    return foods, exercises
+
+FOOD_CAT, EXERCISE_CAT = get_catalogues()
+
+@st.cache_resource
+def get_planner():
+    return MealPlanner(FOOD_CAT.columns)
 
 # --- 6. CALLBACKS ---
 def update_food_cal():
     item = st.session_state.get('food_select')
     qty = st.session_state.get('food_qty', 1.0)
-    if item and item != "Custom..." and item in FOOD_DB['name'].values:
-        base = FOOD_DB.loc[FOOD_DB['name'] == item, 'cal_per_unit'].values[0]
+    base = FOOD_CAT.get(item, 'cal_per_unit')
+    if base is not None:
         total = base * qty
         st.session_state['food_cal_input'] = float(total)
 
 def update_ex_cal():
     item = st.session_state.get('ex_select')
     mins = st.session_state.get('ex_mins', 30)
-    if item and item != "Custom..." and item in EXERCISE_DB['name'].values:
-        rate = EXERCISE_DB.loc[EXERCISE_DB['name'] == item, 'cal_per_min'].values[0]
+    rate = EXERCISE_CAT.get(item, 'cal_per_min')
+    if rate is not None:
         total = rate * mins
         st.session_state['ex_cal_input'] = float(total)
 
 # --- 7. AUTHENTICATION ---
+repo = get_repository(st.session_state.client)
 if not st.session_state.logged_in:
     st.title("🔒 NutriTrack Login")
     tab1, tab2 = st.tabs(["Login", "Create Account"])
@@ -216,26 +265,19 @@ if not st.session_state.logged_in:
             u = st.text_input("Username")
             p = st.text_input("Password", type="password")
             if st.form_submit_button("Login", use_container_width=True):
-                if st.session_state.client:
-                    res = check_login(u, p, st.session_state.client)
+                if repo:
+                    res = check_login(u, p, repo)
                     if res == "PENDING": st.warning("⏳ Account pending approval.")
                     elif res == "ERROR": st.error("System Error.")
                     elif res:
                         st.session_state.logged_in = True
                         st.session_state.username = u
                         st.session_state.real_name = res
-                        prof = load_latest_profile(u, st.session_state.client)
+                        try: prof = repo.latest_profile(u)
+                        except Exception: prof = None
                         if prof:
-                            gs = prof.get('goal', 'Maintain')
-                            if isinstance(gs, str): gs = [x.strip() for x in gs.split(',') if x.strip()]
-                            gs = [g for g in gs if g in GOAL_DB]
-                            if not gs: gs = ['Maintain Current Weight']
-                            st.session_state.user_profile = prof
-                            st.session_state.user_profile['goals'] = gs
-                            t = calculate_bmr_tdee(prof['weight'], prof['height'], prof['age'], prof['gender'], prof['activity'])
-                            st.session_state.user_profile['target'] = calculate_target(t, gs)
-                        ls = get_tab(st.session_state.client, "Sheet1")
-                        if ls: st.session_state.food_log = ls.get_all_records()
+                            st.session_state.user_profile = {**prof, 'goals': parse_goals(prof.get('goal')), 'target': profile_target(prof)}
+                        st.session_state.food_log = load_user_log(repo, u)
                         st.rerun()
                     else: st.error("Invalid credentials.")
     with tab2:
@@ -243,35 +285,41 @@ if not st.session_state.logged_in:
             nu, np = st.text_input("User"), st.text_input("Pass", type="password")
             nn = st.text_input("Name")
             if st.form_submit_button("Register"):
-                if st.session_state.client:
-                    ok, msg = register_user(nu, np, nn, st.session_state.client)
+                if repo:
+                    ok, msg = register_user(nu, np, nn, repo)
                     if ok: st.success(msg)
                     else: st.error(msg)
+    record_render("Login")
     st.stop()
 
 # --- 8. MAIN APP ---
 st.sidebar.markdown(f"### 👤 {st.session_state.real_name}")
+pending = get_write_queue().pending_for(st.session_state.username)
+if st.session_state.client: st.sidebar.caption(f"⏳ {pending} change(s) waiting to sync" if pending else "☁️ All changes synced")
+else: st.sidebar.caption("💾 Saved locally (Google Sheets not connected)")
 use_kj = st.sidebar.toggle("Use Kilojoules (kJ)", value=False)
 unit_label = "kJ" if use_kj else "kcal"
 conv = 4.184 if use_kj else 1.0
 
 if st.sidebar.button("Logout"):
+    get_write_queue().kick()
     st.session_state.logged_in = False
     st.rerun()
 st.sidebar.divider()
-nav = st.sidebar.radio("Navigation", ["📝 Daily Tracker", "📊 Analytics", "📅 Planner", "👤 Profile"])
+pages = ["📝 Daily Tracker", "📊 Analytics", "📅 Planner", "👤 Profile"]
+if is_admin(st.session_state.username): pages += ["🛠️ Admin", "🩺 Diagnostics"]
+nav = st.sidebar.radio("Navigation", pages)
 
 # --- PAGE: TRACKER ---
 if nav == "📝 Daily Tracker":
     st.header(f"📝 Daily Tracker ({unit_label})")
     today_str = str(datetime.date.today())
     
-    # FILTER LOGS
-    all_logs = st.session_state.food_log
-    today_logs = [x for x in all_logs if str(x.get('date')) == today_str and x.get('type') in ['Manual', 'Exercise']]
+    store = st.session_state.food_log
     
-    food_sum = sum([float(x['cal']) for x in today_logs if x['type'] == 'Manual'])
-    burn_sum = sum([float(x['cal']) for x in today_logs if x['type'] == 'Exercise'])
+    totals = store.totals(today_str)
+    food_sum = totals['food']
+    burn_sum = totals['exercise']
     
     base_target = st.session_state.user_profile.get('target', 2000)
     final_target = base_target + burn_sum
@@ -282,11 +330,21 @@ if nav == "📝 Daily Tracker":
     c2.metric("Exercise", f"{int(burn_sum * conv)} {unit_label}")
     c3.metric("Remaining", f"{int(remaining * conv)} {unit_label}", delta="Earned" if burn_sum > 0 else None)
     
+    # MACROS (today vs. goal-based targets, with the trailing 7-day average)
+    macro_goal = macro_targets(base_target, st.session_state.user_profile.get('goals', []))
+    week = rolling_totals(store.daily(), 7, end=today_str).iloc[-1]
+    for col, m in zip(st.columns(len(MACROS)), MACROS):
+        limit = "≤ " if m == 'sugar' else "/ "
+        col.metric(m.title(), f"{totals[m]:.0f} {limit}{macro_goal[m]} g", delta=f"7d avg {week[m]:.0f} g", delta_color="off")
+    
     tab_food, tab_ex = st.tabs(["🍽️ Add Meal", "🏃 Add Exercise"])
     
     with tab_food:
         c1, c2, c3 = st.columns([2, 1, 1])
-        f_opts = ["Custom..."] + list(FOOD_DB['name'].unique())
+        query = c1.text_input("Search Food", key='food_search', placeholder="Type to filter, e.g. salm")
+        f_opts = ["Custom..."] + FOOD_CAT.search(query)
+        picked = st.session_state.get('food_select')
+        if picked and picked not in f_opts: f_opts.append(picked) # Keep the current pick while filtering
         sel_food = c1.selectbox("Food", f_opts, key='food_select', on_change=update_food_cal)
         qty = c2.number_input("Amount (Serving)", 0.5, 10.0, 1.0, step=0.5, key='food_qty', on_change=update_food_cal)
         cal = c3.number_input(f"Calories (kcal)", 0.0, 5000.0, step=10.0, key='food_cal_input')
@@ -296,14 +354,15 @@ if nav == "📝 Daily Tracker":
             if sel_food == "Custom..." and not name: name = st.text_input("Enter Food Name", key="custom_food_name")
             if name and cal > 0:
                 new_entry = {'date': today_str, 'name': name, 'cal': cal, 'type': 'Manual', 'amount': qty, 'unit': 'Serving'}
-                st.session_state.food_log.append(new_entry)
-                sync_log_to_sheet(st.session_state.client, st.session_state.food_log, today_str)
+                new_entry.update({m: round(FOOD_CAT.get(name, m, 0) * qty, 1) for m in MACROS})
+                store.add(new_entry)
+                save_changes(repo, store, [(None, new_entry)], base_target)
                 st.toast(f"Added {name}")
                 st.rerun()
                 
     with tab_ex:
         c1, c2, c3 = st.columns([2, 1, 1])
-        e_opts = ["Custom..."] + list(EXERCISE_DB['name'].unique())
+        e_opts = ("Custom...",) + EXERCISE_CAT.options
         sel_ex = c1.selectbox("Exercise", e_opts, key='ex_select', on_change=update_ex_cal)
         mins = c2.number_input("Duration (mins)", 5, 180, 30, step=5, key='ex_mins', on_change=update_ex_cal)
         ex_cal = c3.number_input(f"Burned (kcal)", 0.0, 5000.0, step=10.0, key='ex_cal_input')
@@ -313,49 +372,100 @@ if nav == "📝 Daily Tracker":
             if sel_ex == "Custom..." and not name: name = st.text_input("Enter Exercise Name", key="custom_ex_name")
             if name and ex_cal > 0:
                 new_entry = {'date': today_str, 'name': name, 'cal': ex_cal, 'type': 'Exercise', 'amount': mins, 'unit': 'mins'}
-                st.session_state.food_log.append(new_entry)
-                sync_log_to_sheet(st.session_state.client, st.session_state.food_log, today_str)
+                store.add(new_entry)
+                save_changes(repo, store, [(None, new_entry)], base_target)
                 st.toast(f"Added {name}")
                 st.rerun()
 
-    # 4. HISTORY (FIXED MISSING COLS)
-    st.subheader("Today's History (Edit/Delete)")
-    if today_logs:
-        df = pd.DataFrame(today_logs)
-        for col in ['amount', 'unit']:
-            if col not in df.columns: df[col] = 1.0 if col == 'amount' else ''
-        
-        edited_df = st.data_editor(
-            df[['name', 'cal', 'type', 'amount', 'unit']],
-            column_config={
-                "cal": st.column_config.NumberColumn("Calories (kcal)"),
-                "amount": st.column_config.NumberColumn("Qty/Mins"),
-            },
-            num_rows="dynamic",
-            use_container_width=True,
-            key="history_editor"
-        )
-        
-        if not df[['name', 'cal', 'type', 'amount', 'unit']].equals(edited_df):
-            if st.button("💾 Save Changes to Cloud"):
-                kept_logs = [x for x in st.session_state.food_log if str(x.get('date')) != today_str]
-                new_logs = edited_df.to_dict('records')
-                for n in new_logs: n['date'] = today_str
-                final_log = kept_logs + new_logs
-                st.session_state.food_log = final_log
-                sync_log_to_sheet(st.session_state.client, final_log, today_str)
-                st.success("History updated!")
-                st.rerun()
-    else:
-        st.info("No logs for today.")
+    # 4. HISTORY (any day; edits are saved as per-entry changes)
+    h1, h2 = st.columns([3, 1])
+    day = h2.date_input("Day", value=datetime.date.today(), max_value=datetime.date.today(), key='history_day')
+    day_str = str(day)
+    h1.subheader("Today's History (Edit/Delete)" if day_str == today_str else f"History for {day_str} (Edit/Delete)")
+    if repo: store.ensure_day(day_str, lambda: repo.read_log(st.session_state.username, day_str, day_str))
+    day_logs = [x for x in store.day(day_str) if x.get('type') in ['Manual', 'Exercise']]
+    edit_cols = ['name', 'cal', 'type', 'amount', 'unit'] + MACROS
+    df = pd.DataFrame(day_logs, columns=edit_cols)
+    df['amount'] = df['amount'].fillna(1.0)
+    df['unit'] = df['unit'].fillna('')
+    df[MACROS] = df[MACROS].fillna(0.0)
+    if not day_logs: st.info("No logs for this day. Add rows below.")
+    
+    st.data_editor(
+        df,
+        column_config={
+            "cal": st.column_config.NumberColumn("Calories (kcal)"),
+            "type": st.column_config.SelectboxColumn("Type", options=['Manual', 'Exercise']),
+            "amount": st.column_config.NumberColumn("Qty/Mins"),
+            **{m: st.column_config.NumberColumn(f"{m.title()} (g)") for m in MACROS}
+        },
+        num_rows="dynamic",
+        use_container_width=True,
+        key="history_editor"
+    )
+    
+    changes = editor_changes(day_logs, st.session_state.get('history_editor') or {}, day_str)
+    if changes:
+        if st.button(f"💾 Save Changes to Cloud ({len(changes)})"):
+            store.apply(changes)
+            save_changes(repo, store, changes, base_target if day_str == today_str else None)
+            st.success("History updated!")
+            st.rerun()
 
 # --- PAGE: ANALYTICS (FIXED TYPO) ---
 elif nav == "📊 Analytics":
     st.header("📊 Analytics")
-    p_sheet = get_tab(st.session_state.client, "profiles")
-    if p_sheet:
-        all_records = p_sheet.get_all_records()
-        user_records = [r for r in all_records if str(r.get('username')) == st.session_state.username]
+    try: daily = repo.daily_frame(st.session_state.username) if repo else None
+    except Exception: daily = None
+    if daily is not None:
+        span = st.radio("Range", ["7 days", "30 days", "365 days"], horizontal=True)
+        today = pd.Timestamp(datetime.date.today())
+        cur_target = st.session_state.user_profile.get('target', 2000)
+        view = window(daily, today, int(span.split()[0]), cur_target)
+        logged = view['food'] > 0
+        
+        # Streaks run over the whole history; today only counts once something is logged
+        first = min(daily.index[0], today) if len(daily) else today
+        full = window(daily, today, (today - first).days + 1, cur_target)
+        full_logged = full['food'] > 0
+        if len(full) and not full_logged.iloc[-1]: full, full_logged = full.iloc[:-1], full_logged.iloc[:-1]
+        on_target = full_logged & ((full['net'] - full['target']).abs() <= 0.1 * full['target'])
+        log_now, log_best = streaks(full_logged)
+        hit_now, hit_best = streaks(on_target)
+        
+        days_logged = int(logged.sum())
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Avg Intake", f"{int(view.loc[logged, 'food'].mean() * conv) if days_logged else 0} {unit_label}", delta=f"target {int(view['target'].mean() * conv)}", delta_color="off")
+        m2.metric("Avg Burn", f"{int(view['exercise'].mean() * conv)} {unit_label}")
+        m3.metric("Avg Net Balance", f"{int(view.loc[logged, 'balance'].mean() * conv) if days_logged else 0} {unit_label}", delta=f"{days_logged} day(s) logged", delta_color="off")
+        m4.metric("Logging Streak", f"{log_now} days", delta=f"best {log_best} · on target {hit_now} (best {hit_best})", delta_color="off")
+        
+        if days_logged:
+            plot = view.reset_index()
+            for c in ['food', 'exercise', 'target', 'net', 'balance']: plot[c] = plot[c] * conv
+            base = alt.Chart(plot).encode(x='date:T')
+            intake = base.mark_bar(opacity=0.6).encode(y=alt.Y('food', title=f"Intake ({unit_label})"), tooltip=['date:T', 'food', 'exercise', 'net', 'target'])
+            target_line = base.mark_line(color='red', strokeDash=[4, 4]).encode(y='target')
+            burn = base.mark_line(point=True, color='green').encode(y='exercise')
+            st.altair_chart((intake + target_line + burn).properties(title="Intake vs Target (bars: intake, red: target, green: burn)"), use_container_width=True)
+            
+            bal = base.mark_bar().encode(
+                y=alt.Y('balance', title=f"Net - Target ({unit_label})"),
+                color=alt.condition("datum.balance > 0", alt.value("#d62728"), alt.value("#2ca02c"))
+            ).transform_filter("datum.food > 0")
+            st.altair_chart(bal.properties(title="Net Balance"), use_container_width=True)
+            
+            st.subheader("Weekly Averages")
+            wk = (weekly(view[logged]) * conv).dropna(how='all').round(0)
+            wk.index = wk.index.strftime("Week of %Y-%m-%d")
+            st.dataframe(wk.rename(columns=str.title), use_container_width=True)
+        else:
+            st.info("No food logged in this range.")
+        st.divider()
+    
+    try: user_records = repo.profile_history(st.session_state.username) if repo else None
+    except Exception: user_records = None
+    if user_records is not None:
         if user_records:
             df = pd.DataFrame(user_records)
             df.columns = [c.lower() for c in df.columns]
@@ -382,39 +492,17 @@ elif nav == "📅 Planner":
     # 1. Select Duration
     duration = col_p2.selectbox("Plan Duration", ["Today's Plan", "Weekly (7 Days)", "Monthly (30 Days)"])
     
+    with st.expander("⚙️ Plan Options"):
+        o1, o2 = st.columns(2)
+        tolerance = o1.slider("Tolerance (± kcal)", 25, 300, 100, step=25)
+        seed = o2.number_input("Seed (0 = random)", 0, 10**6, 0, step=1)
+    
     if st.button("🎲 Generate Meal Plan"):
         days = 1
         if "Weekly" in duration: days = 7
         if "Monthly" in duration: days = 30
         
-        full_plan = {} # Dictionary to store days
-        
-        for d in range(1, days + 1):
-            day_plan = []
-            current_cal = 0
-            attempts = 0
-            
-            # Logic: Ensure 1 Breakfast, 1 Lunch, 1 Dinner first
-            for meal_type in ['Breakfast', 'Lunch', 'Dinner']:
-                # Filter DB for specific meal type
-                options = FOOD_DB[FOOD_DB['type'] == meal_type]
-                if not options.empty:
-                    item = options.sample(1).iloc[0].to_dict()
-                    day_plan.append(item)
-                    current_cal += item['cal_per_unit']
-            
-            # Fill remaining calories with Snacks
-            while current_cal < (current_target - 150) and attempts < 20:
-                options = FOOD_DB[FOOD_DB['type'] == 'Snack']
-                if not options.empty:
-                    item = options.sample(1).iloc[0].to_dict()
-                    day_plan.append(item)
-                    current_cal += item['cal_per_unit']
-                attempts += 1
-                
-            full_plan[f"Day {d}"] = day_plan
-            
-        st.session_state.generated_plan = full_plan
+        st.session_state.generated_plan = get_planner().generate(days, current_target, tolerance, seed or None)
 
     # 2. Display Plan
     if st.session_state.generated_plan:
@@ -424,14 +512,14 @@ elif nav == "📅 Planner":
         # Iterate through days
         for day_label, meals in st.session_state.generated_plan.items():
             # Calculate total cals for the day
-            day_total = sum(m['cal_per_unit'] for m in meals)
+            day_total = sum(m['cal'] for m in meals)
             
-            with st.expander(f"**{day_label}** - {day_total} kcal"):
+            with st.expander(f"**{day_label}** - {int(day_total)} kcal"):
                 for item in meals:
                     c1, c2, c3 = st.columns([2, 1, 1])
                     c1.write(f"**{item['type']}**: {item['name']}")
-                    c2.write(f"{item['cal_per_unit']} kcal")
-                    c3.write(f"_{item['unit']}_")
+                    c2.write(f"{int(item['cal'])} kcal")
+                    c3.write(f"_{item['portion']:g} × {item['unit']}_")
 
 # --- PAGE: PROFILE ---
 elif nav == "👤 Profile":
@@ -449,12 +537,139 @@ elif nav == "👤 Profile":
         act = st.selectbox("Activity", ACTIVITY_LEVELS, index=act_idx)
         
         goals = st.multiselect("Goals", list(GOAL_DB.keys()), default=curr.get('goals', ['Maintain Current Weight']))
+        mt = macro_targets(curr.get('target', 2000), curr.get('goals', []))
+        st.caption("Daily macros: " + ", ".join(f"{m} {'≤ ' if m == 'sugar' else ''}{mt[m]} g" for m in MACROS))
         
         if st.form_submit_button("Update"):
-            t = calculate_bmr_tdee(w, h, a, g, act)
-            tgt = calculate_target(t, goals)
+            tgt = profile_target({'weight': w, 'height': h, 'age': a, 'gender': g, 'activity': act, 'goal': goals})
             upd = {'weight': w, 'height': h, 'age': a, 'gender': g, 'activity': act, 'goals': goals, 'target': tgt}
             st.session_state.user_profile = upd
-            save_profile_update(st.session_state.username, upd, st.session_state.client)
+            if repo: save_profile_update(st.session_state.username, upd, repo)
             st.success(f"Saved! New Target: {tgt} kcal")
             st.rerun()
+    
+    # IMPORT / EXPORT (streamed in chunks, see transfer.py)
+    st.subheader("📦 Import / Export")
+    st.caption("CSV or JSON (an array, or one object per line). Log files need `date` and `name`; blank calories, types and macros are filled in from the food and exercise lists.")
+    user = st.session_state.username
+    kind = st.radio("Data", ["Food log", "Profile history"], horizontal=True, key='transfer_kind')
+    if kind == "Food log": records, fields = (lambda: repo.export_log(user)), LOG_FIELDS
+    else: records, fields = (lambda: repo.profile_history(user)), PROFILE_FIELDS
+    c1, c2 = st.columns(2)
+    fmt = c1.radio("Export as", ["csv", "json"], horizontal=True, key='transfer_fmt')
+    c1.download_button(
+        f"⬇️ Export {kind}", lambda: spool(export_blocks(records(), fields, fmt)),
+        file_name=f"nutritrack_{kind.split()[-1]}.{fmt}", mime="text/csv" if fmt == "csv" else "application/json", disabled=not repo
+    )
+    upload = c2.file_uploader(f"Import {kind}", type=["csv", "json", "jsonl"], key='transfer_file')
+    if repo and upload and c2.button(f"⬆️ Import {upload.name}"):
+        f = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        try:
+            if kind == "Food log":
+                res = import_stream(f, file_format(upload.name), lambda recs, first: validate_log(recs, FOOD_CAT, EXERCISE_CAT, first), lambda rows: repo.import_log(user, rows))
+                st.session_state.food_log = load_user_log(repo, user)
+            else:
+                res = import_stream(f, file_format(upload.name), lambda recs, first: validate_profiles(recs, user, GOAL_DB, ACTIVITY_LEVELS, first), repo.import_profiles)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            res = None
+            st.error(f"❌ Could not read {upload.name}: {e}")
+        finally:
+            f.detach()
+        if res:
+            st.success(f"Imported {res['imported']} row(s), skipped {res['skipped']}.")
+            if res['errors']: st.dataframe(pd.DataFrame(res['errors'], columns=['record', 'problem']), hide_index=True, use_container_width=True)
+
+# --- PAGE: ADMIN ---
+elif nav == "🛠️ Admin":
+    st.header("🛠️ Admin")
+    st.subheader("Pending Accounts")
+    pending = repo.pending_users() if repo else []
+    if pending:
+        df = pd.DataFrame(pending)
+        df.insert(0, 'approve', False)
+        picked = st.data_editor(
+            df.drop(columns=['password'], errors='ignore'),
+            column_config={"approve": st.column_config.CheckboxColumn("Approve")},
+            disabled=[c for c in df.columns if c != 'approve'],
+            use_container_width=True,
+            key="approve_editor"
+        )
+        c1, c2 = st.columns(2)
+        chosen = list(picked.loc[picked['approve'], 'username'])
+        if c1.button(f"✅ Approve Selected ({len(chosen)})", disabled=not chosen):
+            done = repo.approve_users(chosen)
+            st.success(f"Approved {len(done)} account(s).")
+            st.rerun()
+        if c2.button(f"✅ Approve All ({len(pending)})"):
+            done = repo.approve_users([u['username'] for u in pending])
+            st.success(f"Approved {len(done)} account(s).")
+            st.rerun()
+    else:
+        st.info("No accounts waiting for approval.")
+    
+    st.subheader("Storage")
+    st.caption("The Analytics page reads per-day rollups that are kept up to date as logs are saved. Rebuild them after editing the log by hand.")
+    c1, c2 = st.columns(2)
+    if repo and c1.button("🔄 Rebuild Daily Rollups"):
+        st.success(f"Rebuilt {repo.rebuild_daily()} daily row(s).")
+    if isinstance(repo, MirroredRepository):
+        st.caption(f"Local database `{DB_PATH}`, exported to Google Sheets in the background.")
+        if c2.button("⬇️ Re-import from Google Sheets"):
+            st.success(f"Imported; {repo.reimport()} daily row(s) rebuilt.")
+    
+    st.subheader("Calorie Targets")
+    st.caption("Every user's target from their latest profile and the current goal adjustments. Saving records them as today's target in the daily rollups, for all users in one write.")
+    if repo:
+        table = get_target_table().get(repo)
+        t1, t2 = st.columns(2)
+        t1.metric("Users with a Profile", len(table))
+        t2.metric("Median Target", f"{int(table['target'].median()) if len(table) else 0} kcal")
+        with st.expander("All targets"):
+            st.dataframe(table, column_config={c: st.column_config.NumberColumn(format="%.0f") for c in ['bmr', 'tdee']}, hide_index=True, use_container_width=True)
+        if st.button(f"🎯 Save Targets for All Users ({len(table)})", disabled=table.empty):
+            done = repo.save_targets(str(datetime.date.today()), dict(zip(table['username'], table['target'].tolist())))
+            mine = table.loc[table['username'] == st.session_state.username, 'target']
+            if len(mine): st.session_state.user_profile['target'] = int(mine.iloc[0])
+            st.success(f"Saved {done} target(s) for {datetime.date.today()}.")
+
+# --- PAGE: DIAGNOSTICS ---
+elif nav == "🩺 Diagnostics":
+    st.header("🩺 Diagnostics")
+    metrics = get_metrics()
+    st.caption(f"Since {datetime.datetime.fromtimestamp(metrics.started):%Y-%m-%d %H:%M:%S}, for this server process.")
+    
+    st.subheader("Sheets Quota (last 60 s)")
+    per_minute = metrics.per_minute()
+    q1, q2, q3, q4 = st.columns(4)
+    for col, kind in zip((q1, q2), ('read', 'write')):
+        col.metric(f"{kind.title()} Requests", f"{per_minute[kind]} / {QUOTA_PER_MINUTE[kind]}")
+        col.progress(min(per_minute[kind] / QUOTA_PER_MINUTE[kind], 1.0))
+    q3.metric("Queued Writes", get_write_queue().pending_total())
+    ts = get_throttle().stats()
+    q4.metric("Coalesced Reads", ts['coalesced'], delta=f"{ts['retries']} retried", delta_color="off")
+    
+    fmt = {c: st.column_config.NumberColumn(format="%.1f") for c in ['mean ms', 'p95 ms', 'max ms']}
+    st.subheader("Sheets API Calls")
+    calls = metrics.table("sheets")
+    if calls: st.dataframe(pd.DataFrame(calls).sort_values('calls', ascending=False), column_config=fmt, hide_index=True, use_container_width=True)
+    else: st.info("No Google Sheets calls yet.")
+    
+    st.subheader("Page Renders")
+    renders = metrics.table("page")
+    if renders: st.dataframe(pd.DataFrame(renders).drop(columns=['errors', 'error codes', 'rows']), column_config=fmt, hide_index=True, use_container_width=True)
+    
+    st.subheader("Shared Cache")
+    cs = get_cache().stats()
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Entries", cs['entries'])
+    k2.metric("Hits / Misses", f"{cs['hits']} / {cs['misses']}")
+    k3.metric("Hit Rate", f"{cs['hit_rate']:.0%}")
+    
+    c1, c2 = st.columns(2)
+    c1.download_button("⬇️ Prometheus Metrics", metrics.render({"handles": get_cache()}), file_name="nutritrack.prom", mime="text/plain")
+    if c2.button("♻️ Reset Counters"):
+        metrics.reset()
+        st.rerun()
+    if METRICS_FILE: st.caption(f"Also written to `{METRICS_FILE}` for node_exporter's textfile collector.")
+
+record_render(nav)
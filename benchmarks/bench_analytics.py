@@ -0,0 +1,81 @@
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from fake_sheets import FakeClient
+from nutrition import daily_totals
+from rollups import DailyRollup, window
+from sheet_sync import LOG_HEADER, row_to_entry
+
+# Analytics page load for one user: scanning Sheet1 vs. the `daily` rollup tab
+# (first load in a process, then every load after that).
+#   python benchmarks/bench_analytics.py --users 10 100 --days 365
+
+
+def make_book(client, users, days, per_day):
+    book = client.create("NutriTrack_Data")
+    start = datetime.date(2030, 1, 1) - datetime.timedelta(days=days)
+    rows = [LOG_HEADER]
+    for d in range(days):
+        date_str = str(start + datetime.timedelta(days=d))
+        for u in range(users):
+            rows += [[date_str, "Apple", "80", "Manual", "1", "Serving", f"user{u}", "0.4", "21", "0.3", "4", "16"]] * per_day
+    sheet = book.add_worksheet("Sheet1", rows=rows)
+    daily = book.add_worksheet("daily", rows=[[]])
+    DailyRollup().rebuild(daily, rows)
+    return sheet, daily
+
+
+def scan(sheet, username, end, days):
+    # What the page would do without rollups: pull the whole log and aggregate
+    entries = [row_to_entry(r) for r in sheet.get_all_values()[1:] if len(r) > 6 and r[6] == username]
+    per_day = daily_totals(entries)
+    return per_day.reindex(pd.date_range(end - pd.Timedelta(days=days - 1), end, freq='D'), fill_value=0.0)
+
+
+def run(users, days, per_day, loads, latency, per_row):
+    client = FakeClient(latency=latency, per_row=per_row)
+    sheet, daily = make_book(client, users, days, per_day)
+    end = pd.Timestamp(2029, 12, 31)
+    shared = DailyRollup()
+    shared.user_frame(daily, "user1")
+    out = {}
+    for label in ("scan", "cold", "warm"):
+        client.reset_counters()
+        times = []
+        for _ in range(loads):
+            # cold: a new server process reading the whole tab; warm: the
+            # process-wide view every later page load uses
+            t0 = time.perf_counter()
+            if label == "scan": scan(sheet, "user0", end, 365)
+            else: window((DailyRollup() if label == "cold" else shared).user_frame(daily, "user0"), end, 365, 2000)
+            times.append(time.perf_counter() - t0)
+        out[label] = (statistics.median(times) * 1000, client.total_calls() / loads, client.rows_moved / loads)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, nargs="+", default=[10, 100])
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--per-day", type=int, default=6, help="log rows per user per day")
+    ap.add_argument("--loads", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API call")
+    ap.add_argument("--per-row", type=float, default=0.0, help="simulated seconds per row transferred")
+    args = ap.parse_args()
+
+    print(f"{'users':>6} | {'source':>6} | {'p50 ms':>9} | {'calls/load':>10} | {'rows/load':>10}")
+    for n in args.users:
+        for label, (ms, calls, rows) in run(n, args.days, args.per_day, args.loads, args.latency, args.per_row).items():
+            print(f"{n:>6} | {label:>6} | {ms:>9.2f} | {calls:>10.1f} | {rows:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
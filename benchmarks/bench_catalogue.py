@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Startup time and resident memory of bringing up a large food catalogue, each variant
+# in a fresh interpreter:
+#   dataframe - the old approach: a DataFrame built from row dicts, mask lookups
+#   npy       - catalogue.load_catalogue() on memory-mapped .npy column files
+#   python benchmarks/bench_catalogue.py --rows 300000
+
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+import numpy as np, pandas as pd
+def rss_mb():
+    with open('/proc/self/status') as f:
+        return int(f.read().split('VmRSS:')[1].split()[0]) / 1024
+base_rss = rss_mb()
+mode, path, n = {mode!r}, {path!r}, {rows}
+t1 = time.perf_counter()
+if mode == "dataframe":
+    cols = {{c: np.load(f"{{path}}/{{c}}.npy") for c in ('name', 'cal_per_unit', 'unit', 'type')}}
+    rows = [dict(name=cols['name'][i].decode(), cal_per_unit=float(cols['cal_per_unit'][i]), unit=cols['unit'][i].decode(), type=cols['type'][i].decode()) for i in range(n)]
+    t1 = time.perf_counter()  # don't charge the old path for reading our file format
+    db = pd.DataFrame(rows)
+    ready = time.perf_counter()
+    del rows, cols
+    ready_rss = indexed_rss = rss_mb()
+    name = db['name'].iloc[n // 2]
+    t2 = time.perf_counter()
+    for _ in range(100):
+        if name in db['name'].values: db.loc[db['name'] == name, 'cal_per_unit'].values[0]
+    lookup = (time.perf_counter() - t2) / 100
+else:
+    from catalogue import load_catalogue
+    cat = load_catalogue(path)
+    ready = time.perf_counter()
+    ready_rss = rss_mb()
+    name = cat.names[n // 2].decode()
+    cat.get(name, 'cal_per_unit')  # first lookup builds the name index
+    first = time.perf_counter()
+    indexed_rss = rss_mb()
+    t2 = time.perf_counter()
+    for _ in range(100): cat.get(name, 'cal_per_unit')
+    lookup = (time.perf_counter() - t2) / 100
+    ready_first = first - t1
+print(json.dumps(dict(
+    ready_ms=(ready - t1) * 1000,
+    first_lookup_ms=(locals().get('ready_first', ready - t1)) * 1000,
+    lookup_us=lookup * 1e6,
+    ready_rss=ready_rss - base_rss,
+    indexed_rss=indexed_rss - base_rss,
+)))
+"""
+
+
+def make_file(path, rows):
+    import numpy as np
+    import pandas as pd
+    from catalogue import save_catalogue
+    rng = np.random.default_rng(0)
+    types = np.array(['Breakfast', 'Lunch', 'Dinner', 'Snack'])
+    save_catalogue(pd.DataFrame({
+        'name': [f"Food item {i}" for i in range(rows)],
+        'cal_per_unit': rng.integers(50, 900, rows).astype(float),
+        'unit': 'Serving',
+        'type': types[rng.integers(0, 4, rows)],
+    }), path)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=300000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "foods")
+        make_file(path, args.rows)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"{args.rows} rows, {size / 2**20:.1f} MB on disk\n")
+        print(f"{'variant':>9} | {'ready ms':>9} | {'1st lookup ms':>13} | {'lookup us':>9} | {'+RSS ready':>10} | {'+RSS indexed':>12}")
+        for mode in ("dataframe", "npy"):
+            code = PROBE.format(root=ROOT, mode=mode, path=path, rows=args.rows)
+            out = json.loads(subprocess.check_output([sys.executable, "-c", code]))
+            print(f"{mode:>9} | {out['ready_ms']:>9.1f} | {out['first_lookup_ms']:>13.1f} | {out['lookup_us']:>9.2f} | "
+                  f"{out['ready_rss']:>7.1f} MB | {out['indexed_rss']:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import datetime
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from accounts import ProfileView, UserDirectory
+from catalogue import DEFAULT_EXERCISES, DEFAULT_FOODS, Catalogue
+from fake_sheets import demo_client
+from log_store import new_entry_id
+from nutrition import daily_totals, day_totals
+from rollups import DailyRollup
+from sheet_sync import LogSync, WriteBehind
+from storage import SheetsRepository, SQLiteRepository
+from transfer import import_stream, validate_log
+
+# Importing a CSV with years of log entries: saving each entry through
+# save_entries(), as the tracker's Add buttons do, vs. transfer.import_stream()
+# in chunks.
+#   python benchmarks/bench_import.py --days 730 --per-day 6 --latency 0.05
+
+FOODS, EXERCISES = Catalogue.from_records(DEFAULT_FOODS), Catalogue.from_records(DEFAULT_EXERCISES)
+
+
+def make_csv(days, per_day):
+    start = datetime.date(2030, 1, 1) - datetime.timedelta(days=days)
+    lines = ["date,food,qty"]
+    for d in range(days):
+        lines += [f"{start + datetime.timedelta(days=d)},Apple,1"] * per_day
+    return "\n".join(lines) + "\n"
+
+
+def sheets_repo(client):
+    book = client.open("NutriTrack_Data")
+    handles = {}
+    def tab(name, cols=None):
+        if name not in handles:
+            try: handles[name] = book.worksheet(name)
+            except Exception:
+                if not cols: return None
+                handles[name] = book.add_worksheet(name, rows=1000, cols=cols)
+        return handles[name]
+    return SheetsRepository(tab, WriteBehind(interval=3600), UserDirectory(), ProfileView(), LogSync(), DailyRollup())
+
+
+def per_entry(repo, text):
+    # What the tracker offers: every entry is added on its own
+    days = {}
+    for line in text.splitlines()[1:]:
+        date_str, name, qty = line.split(",")
+        day = days.setdefault(date_str, [])
+        entry = {'date': date_str, 'name': name, 'cal': 80 * float(qty), 'type': 'Manual', 'amount': float(qty), 'unit': 'Piece', 'entry_id': new_entry_id()}
+        day.append(entry)
+        repo.save_entries("user0", [(None, entry)], {date_str: day_totals(daily_totals(day), date_str)}, 2000)
+        if hasattr(repo, 'queue'): repo.queue.flush()
+
+
+def chunked(repo, text):
+    import_stream(io.StringIO(text), 'csv', lambda recs, first: validate_log(recs, FOODS, EXERCISES, first),
+                  lambda rows: repo.import_log("user0", rows))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--per-day", type=int, default=6)
+    ap.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API call")
+    args = ap.parse_args()
+
+    text = make_csv(args.days, args.per_day)
+    print(f"{args.days * args.per_day} entries\n")
+    print(f"{'backend':>7} | {'method':>9} | {'seconds':>8} | {'API calls':>9} | {'peak MB':>8}")
+    for backend in ("sheets", "sqlite"):
+        for label, fn in (("per entry", per_entry), ("chunked", chunked)):
+            client = demo_client(users=[("user0", "pw", "User 0")])
+            repo = sheets_repo(client) if backend == "sheets" else SQLiteRepository(":memory:")
+            client.latency = args.latency
+            client.reset_counters()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            fn(repo, text)
+            secs = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"{backend:>7} | {label:>9} | {secs:>8.2f} | {client.total_calls():>9} | {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import DEFAULT_FOODS
+from planner import MealPlanner
+
+# Old per-meal DataFrame sampling loop vs. the vectorized MealPlanner.
+#   python benchmarks/bench_planner.py --target 2200
+
+FOODS = pd.DataFrame(DEFAULT_FOODS)
+
+
+def legacy_plan(food_db, days, target):
+    full_plan = {}
+    for d in range(1, days + 1):
+        day_plan, current_cal, attempts = [], 0, 0
+        for meal_type in ['Breakfast', 'Lunch', 'Dinner']:
+            options = food_db[food_db['type'] == meal_type]
+            if not options.empty:
+                item = options.sample(1).iloc[0].to_dict()
+                day_plan.append(item)
+                current_cal += item['cal_per_unit']
+        while current_cal < (target - 150) and attempts < 20:
+            options = food_db[food_db['type'] == 'Snack']
+            if not options.empty:
+                item = options.sample(1).iloc[0].to_dict()
+                day_plan.append(item)
+                current_cal += item['cal_per_unit']
+            attempts += 1
+        full_plan[f"Day {d}"] = day_plan
+    return full_plan
+
+
+def day_errors(plan, target, key):
+    return [abs(sum(m[key] for m in meals) - target) for meals in plan.values()]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, nargs="+", default=[1, 7, 30, 365])
+    ap.add_argument("--target", type=int, default=2000)
+    ap.add_argument("--tolerance", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    planner = MealPlanner(FOODS)
+    print(f"MealPlanner setup: {(time.perf_counter() - t0) * 1000:.2f} ms\n")
+
+    print(f"{'days':>5} | {'engine':>6} | {'p50 ms':>9} | {'mean |err|':>10} | {'within tol':>10}")
+    for days in args.days:
+        for label in ("legacy", "vector"):
+            times, errs = [], []
+            for r in range(args.repeat):
+                t0 = time.perf_counter()
+                if label == "legacy":
+                    plan = legacy_plan(FOODS, days, args.target)
+                    key = 'cal_per_unit'
+                else:
+                    plan = planner.generate(days, args.target, args.tolerance, seed=r)
+                    key = 'cal'
+                times.append(time.perf_counter() - t0)
+                errs += day_errors(plan, args.target, key)
+            within = sum(e <= args.tolerance for e in errs) / len(errs)
+            print(f"{days:>5} | {label:>6} | {statistics.median(times) * 1000:>9.2f} | {statistics.mean(errs):>10.1f} | {within:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
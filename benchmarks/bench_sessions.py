@@ -0,0 +1,190 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+from fake_sheets import demo_client
+
+# Load test: N simulated users drive app.py headlessly through Streamlit's
+# AppTest against fake_sheets with injectable latency. Every user logs in,
+# then each round adds a food and an exercise, edits today's history, opens
+# Analytics and generates a weekly plan.
+#
+# AppTest is not thread-safe, so sessions take turns inside one process. They
+# still share the process-wide caches, write-behind queue and database, as
+# sessions on one server do. API calls made by the write-behind thread are
+# reported separately from calls made while a rerun was running.
+#
+# Afterwards user0, as admin, approves a pending registration, and the sheet
+# is checked once the queue is idle: the approval and every logged entry must
+# have reached it (with SQLite storage, through the Sheets export).
+#   python benchmarks/bench_sessions.py --users 20 --rounds 3 --latency 0.05
+
+APP = os.path.join(ROOT, "app.py")
+BACKGROUND = "write-behind"
+PENDING = "newcomer"
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Session:
+    def __init__(self, client, username, stats, admin=False):
+        self.client = client
+        self.username = username
+        self.stats = stats
+        self.at = AppTest.from_file(APP, default_timeout=120)
+        self.at.session_state['client'] = client
+        if admin: self.at.secrets['admins'] = [username]
+        self.edits = 0
+
+    def rerun(self, action, prepare=None):
+        # One timed script rerun, with the widget interaction applied first
+        if prepare: prepare(self.at)
+        before = self.foreground_calls()
+        t0 = time.perf_counter()
+        self.at.run()
+        ms = (time.perf_counter() - t0) * 1000
+        if self.at.exception: raise RuntimeError(f"{action}: {self.at.exception[0].message}")
+        self.stats.setdefault(action, []).append((ms, self.foreground_calls() - before))
+
+    def foreground_calls(self):
+        return sum(n for t, n in self.client.thread_calls.items() if t != BACKGROUND)
+
+    def button(self, label):
+        return next(b for b in self.at.button if label in b.label)
+
+    def login(self):
+        self.rerun("open")
+        def fill(at):
+            at.text_input[0].input(self.username)
+            at.text_input[1].input("pw")
+            at.button[0].click()
+        self.rerun("login", fill)
+
+    def round(self):
+        self.rerun("pick food", lambda at: at.selectbox(key='food_select').select('Apple'))
+        self.rerun("add food", lambda _: self.button("Add Food").click())
+        self.rerun("pick exercise", lambda at: at.selectbox(key='ex_select').select('Cycling'))
+        self.rerun("add exercise", lambda _: self.button("Add Exercise").click())
+
+        # data_editor has no AppTest wrapper; its state is the edit delta
+        self.edits += 1
+        edit = {"edited_rows": {0: {"cal": 90 + self.edits}}, "added_rows": [], "deleted_rows": []}
+        self.rerun("edit history", lambda at: at.session_state.__setitem__('history_editor', edit))
+        def save(at):
+            at.session_state['history_editor'] = edit
+            self.button("Save Changes").click()
+        self.rerun("save history", save)
+
+        self.rerun("analytics", lambda at: at.sidebar.radio[0].set_value("📊 Analytics"))
+        self.rerun("planner", lambda at: at.sidebar.radio[0].set_value("📅 Planner"))
+        def generate(at):
+            at.selectbox[0].set_value("Weekly (7 Days)")
+            self.button("Generate").click()
+        self.rerun("generate plan", generate)
+        self.rerun("tracker", lambda at: at.sidebar.radio[0].set_value("📝 Daily Tracker"))
+
+    def approve_pending(self):
+        self.rerun("admin", lambda at: at.sidebar.radio[0].set_value("🛠️ Admin"))
+        self.rerun("approve", lambda _: self.button("Approve All").click())
+
+
+def wait_for_queue(client, idle=3.0, timeout=60.0):
+    # The write-behind queue flushes on a timer; wait until it has gone quiet
+    end, last, quiet_since = time.monotonic() + timeout, None, time.monotonic()
+    while time.monotonic() < end:
+        now = client.thread_calls.get(BACKGROUND, 0)
+        if now != last: last, quiet_since = now, time.monotonic()
+        elif time.monotonic() - quiet_since >= idle: break
+        time.sleep(0.2)
+
+
+def sheet_problems(client, expected_rows):
+    book = client.open("NutriTrack_Data")
+    status = {r[0]: r[4] for r in book.worksheet("users").get_all_values()[1:]}
+    logged = len(book.worksheet("Sheet1").get_all_values()) - 1
+    problems = []
+    if status.get(PENDING) != "approved": problems.append(f"{PENDING} is '{status.get(PENDING)}' in the users tab")
+    if logged != expected_rows: problems.append(f"Sheet1 has {logged} entries, expected {expected_rows}")
+    return problems
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=10)
+    ap.add_argument("--rounds", type=int, default=2)
+    ap.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API call")
+    ap.add_argument("--per-row", type=float, default=0.0, help="simulated seconds per row transferred")
+    ap.add_argument("--storage", choices=["sqlite", "sheets"], default="sqlite")
+    ap.add_argument("--max-p99", type=float, help="exit non-zero if the overall p99 rerun exceeds this many ms")
+    ap.add_argument("--max-calls", type=float, help="exit non-zero if any action averages more foreground calls per rerun")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["NUTRITRACK_STORAGE"] = args.storage
+    os.environ["NUTRITRACK_DB"] = os.path.join(tmp, "bench.db")
+    client = demo_client(users=[(f"user{i}", "pw", f"User {i}") for i in range(args.users)])
+    client.open("NutriTrack_Data").worksheet("users").append_row([PENDING, "pw", "Newcomer", "2020-01-01", "pending"])
+    client.latency, client.per_row = args.latency, args.per_row
+
+    stats = {}
+    t0 = time.perf_counter()
+    sessions = [Session(client, f"user{i}", stats, admin=i == 0) for i in range(args.users)]
+    sessions[0].login()
+    rss0 = rss_mb() # after the first session has warmed the process-wide caches
+    for s in sessions[1:]: s.login()
+    per_session = (rss_mb() - rss0) / max(len(sessions) - 1, 1)
+    for _ in range(args.rounds):
+        for s in sessions: s.round()
+    wall = time.perf_counter() - t0
+    wait_for_queue(client)
+
+    print(f"{args.users} users x {args.rounds} rounds, storage={args.storage}, latency={args.latency * 1000:g} ms/call\n")
+    print(f"{'action':>14} | {'reruns':>6} | {'p50 ms':>8} | {'p99 ms':>8} | {'calls/rerun':>11}")
+    every, worst_calls = [], 0.0
+    for action, runs in stats.items():
+        ms = [m for m, _ in runs]
+        every += ms
+        calls = statistics.mean(c for _, c in runs)
+        if action != "open": worst_calls = max(worst_calls, calls) # first open pays the one-off import
+        print(f"{action:>14} | {len(runs):>6} | {percentile(ms, 50):>8.1f} | {percentile(ms, 99):>8.1f} | {calls:>11.2f}")
+    print(f"{'all':>14} | {len(every):>6} | {percentile(every, 50):>8.1f} | {percentile(every, 99):>8.1f} |")
+
+    writes = sum(len(stats.get(a, [])) for a in ("add food", "add exercise", "save history"))
+    background = client.thread_calls.get(BACKGROUND, 0)
+    print(f"\nbackground API calls: {background} ({background / max(writes, 1):.2f} per write action)")
+    print(f"memory per logged-in session: {per_session:.2f} MB RSS")
+    print(f"wall time: {wall:.1f} s")
+
+    # After the report, so the admin reruns don't count in it
+    sessions[0].approve_pending()
+    wait_for_queue(client)
+    problems = sheet_problems(client, 2 * args.users * args.rounds) # a food and an exercise per user per round
+    print(f"sheet check: {'; '.join(problems) or 'ok'}")
+
+    # Regression gates for CI
+    failed = list(problems)
+    if args.max_p99 is not None and percentile(every, 99) > args.max_p99: failed.append(f"p99 {percentile(every, 99):.0f} ms > {args.max_p99:g}")
+    if args.max_calls is not None and worst_calls > args.max_calls: failed.append(f"{worst_calls:.2f} calls/rerun > {args.max_calls:g}")
+    if failed: sys.exit("FAILED: " + "; ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from accounts import ProfileView, UserDirectory
+from fake_sheets import demo_client
+from rollups import DailyRollup
+from log_store import new_entry_id
+from sheet_sync import LogSync, WriteBehind, entry_to_row
+from storage import SheetsRepository, SQLiteRepository
+
+# Per-action latency of the storage backends, as seen by a session that has
+# just logged in (cold process-wide views) and then keeps using the app.
+#   python benchmarks/bench_storage.py --users 200 --days 90 --latency 0.05
+
+
+def make_client(users, days, latency):
+    client = demo_client(users=[(f"user{u}", "pw", f"User {u}") for u in range(users)])
+    log = client.open("NutriTrack_Data").worksheet("Sheet1")
+    end = datetime.date(2030, 1, 1)
+    log.append_rows([
+        entry_to_row({'date': end - datetime.timedelta(days=d), 'name': "Apple", 'cal': 80, 'type': 'Manual', 'username': f"user{u}"})
+        for d in range(days) for u in range(users) for _ in range(3)
+    ])
+    client.latency = latency
+    return client
+
+
+def sheets_repo(client):
+    book = client.open("NutriTrack_Data")
+    handles = {}  # app.get_tab() caches worksheet handles the same way
+    def tab(name, cols=None):
+        if name not in handles:
+            try: handles[name] = book.worksheet(name)
+            except Exception:
+                if not cols: return None
+                handles[name] = book.add_worksheet(name, rows=1000, cols=cols)
+        return handles[name]
+    queue = WriteBehind(interval=3600)  # keep the flusher out of the measurement
+    return SheetsRepository(tab, queue, UserDirectory(), ProfileView(), LogSync(), DailyRollup())
+
+
+def save_entry(repo, user):
+    # One "Add Food" click
+    entry = {'date': "2030-01-01", 'name': "Tea", 'cal': 5, 'type': 'Manual', 'entry_id': new_entry_id()}
+    repo.save_entries(user, [(None, entry)], {"2030-01-01": {'food': 5}}, 2000)
+
+
+def actions(repo, user):
+    return [
+        ("login", lambda: repo.get_user(user)),
+        ("profile", lambda: repo.latest_profile(user)),
+        ("read 30d", lambda: repo.read_log(user, "2029-12-03", "2030-01-01")),
+        ("save", lambda: save_entry(repo, user)),
+        ("analytics", lambda: repo.daily_frame(user)),
+    ]
+
+
+def run(users, days, latency, rounds):
+    client = make_client(users, days, latency)
+    sheets = sheets_repo(client)
+    with tempfile.TemporaryDirectory() as tmp:
+        local = SQLiteRepository(os.path.join(tmp, "bench.db"))
+        local.load_dump(sheets.dump())
+        out = {}
+        for label, repo in (("sheets", sheets), ("sqlite", local)):
+            for i in range(rounds):
+                for name, fn in actions(repo, f"user{i % users}"):
+                    client.reset_counters()
+                    t0 = time.perf_counter()
+                    fn()
+                    # First round is the cold start, the rest are steady state
+                    out.setdefault((label, name, i == 0), []).append(((time.perf_counter() - t0) * 1000, client.total_calls()))
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--latency", type=float, default=0.05, help="simulated seconds per API call")
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    out = run(args.users, args.days, args.latency, args.rounds)
+    print(f"{'action':>9} | {'backend':>7} | {'cold ms':>9} | {'p50 ms':>9} | {'calls/op':>8}")
+    for name, _ in actions(None, None):
+        for label in ("sheets", "sqlite"):
+            cold = out[(label, name, True)][0][0]
+            warm = out[(label, name, False)]
+            ms = statistics.median(t for t, _ in warm)
+            calls = statistics.mean(c for _, c in warm)
+            print(f"{name:>9} | {label:>7} | {cold:>9.2f} | {ms:>9.2f} | {calls:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
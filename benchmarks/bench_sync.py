@@ -0,0 +1,74 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sheets import FakeClient
+from log_store import new_entry_id
+from sheet_sync import LOG_HEADER, LogSync, entry_to_row
+
+# Write latency of one "Add Food" click as Sheet1 grows.
+#   python benchmarks/bench_sync.py --sizes 1000 10000 100000
+
+
+def legacy_sync(sheet, log_data, date_str):
+    # The old full-sheet rewrite, kept here for comparison
+    all_vals = sheet.get_all_values()
+    if not all_vals: return
+    new_rows = [row for row in all_vals if row[0] != date_str]
+    for entry in log_data:
+        if str(entry['date']) == date_str:
+            new_rows.append(entry_to_row(entry))
+    sheet.clear()
+    sheet.update(new_rows)
+
+
+def make_sheet(client, n_rows):
+    book = client.create("NutriTrack_Data")
+    rows = [LOG_HEADER] + [
+        [f"2020-01-{1 + i % 28:02d}", "Apple", "80", "Manual", "1", "Serving", f"user{i % 500}"] for i in range(n_rows)
+    ]
+    return book.add_worksheet("Sheet1", rows=rows)
+
+
+def run(n_rows, writes, latency, per_row):
+    today = "2030-01-01"
+    out = {}
+    for label in ("legacy", "delta"):
+        client = FakeClient(latency=latency, per_row=per_row)
+        sheet = make_sheet(client, n_rows)
+        engine = LogSync()
+        if label == "delta": engine.read(sheet, "bench", today, today)  # one-off warm-up index read
+        client.reset_counters()
+        log, times = [], []
+        for i in range(writes):
+            entry = {'date': today, 'name': f"Item {i}", 'cal': 100 + i, 'type': 'Manual', 'amount': 1, 'unit': 'Serving',
+                     'username': "bench", 'entry_id': new_entry_id()}
+            log.append(entry)
+            t0 = time.perf_counter()
+            if label == "legacy": legacy_sync(sheet, log, today)
+            else: engine.apply(sheet, {("bench", entry['entry_id']): (None, entry)})
+            times.append(time.perf_counter() - t0)
+        out[label] = (statistics.median(times) * 1000, client.total_calls() / writes, client.rows_moved / writes)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--writes", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API call")
+    ap.add_argument("--per-row", type=float, default=0.0, help="simulated seconds per row transferred")
+    args = ap.parse_args()
+
+    print(f"{'rows':>8} | {'engine':>6} | {'p50 ms':>9} | {'calls/write':>11} | {'rows/write':>10}")
+    for n in args.sizes:
+        for label, (ms, calls, rows) in run(n, args.writes, args.latency, args.per_row).items():
+            print(f"{n:>8} | {label:>6} | {ms:>9.2f} | {calls:>11.1f} | {rows:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
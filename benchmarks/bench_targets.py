@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteRepository
+from targets import ACTIVITY_LEVELS, GOAL_DB, TargetTable, compute_targets, profile_target
+
+# Targets for every user's latest profile: the old per-user functions and
+# targets.profile_target() in a loop vs. one targets.compute_targets() pass,
+# and TargetTable cold/warm. "us/login" is one profile_target() call, what a
+# login or profile save pays.
+#   python benchmarks/bench_targets.py --users 1000 10000 100000
+
+
+def calculate_target(tdee, goals):
+    # The old per-call versions, kept here for comparison
+    if isinstance(goals, str): goals = [goals]
+    adj = sum([GOAL_DB.get(g, 0) for g in goals])
+    return max(int(tdee + adj), 1200)
+
+
+def calculate_bmr_tdee(weight, height, age, gender, activity):
+    bmr = (10 * weight) + (6.25 * height) - (5 * age) + 5 if gender == 'Male' else (10 * weight) + (6.25 * height) - (5 * age) - 161
+    multi = {"Sedentary": 1.2, "Lightly Active": 1.375, "Moderately Active": 1.55, "Very Active": 1.725, "Athlete": 1.9}
+    act_key = next((k for k in multi if k in activity), "Sedentary")
+    return bmr * multi[act_key]
+
+
+def per_user(profiles):
+    out = {}
+    for p in profiles:
+        goals = [g.strip() for g in p['goal'].split(',') if g.strip() in GOAL_DB] or ['Maintain Current Weight']
+        out[p['username']] = calculate_target(calculate_bmr_tdee(p['weight'], p['height'], p['age'], p['gender'], p['activity']), goals)
+    return out
+
+
+def make_profiles(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'username': f"user{i}", 'date': "2030-01-01", 'weight': round(rng.uniform(45, 140), 1), 'height': rng.randint(150, 200),
+        'age': rng.randint(16, 85), 'gender': rng.choice(["Male", "Female"]), 'activity': rng.choice(ACTIVITY_LEVELS),
+        'goal': ", ".join(rng.sample(list(GOAL_DB), rng.randint(1, 3)))
+    } for i in range(n)]
+
+
+def scalar(profiles):
+    return {p['username']: profile_target(p) for p in profiles}
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = ap.parse_args()
+
+    print(f"{'users':>7} | {'per user ms':>11} | {'scalar ms':>9} | {'batch ms':>9} | {'table cold ms':>13} | {'table warm ms':>13} | {'us/login':>8}")
+    for n in args.users:
+        profiles = make_profiles(n)
+        repo = SQLiteRepository(":memory:")
+        repo.import_profiles([[p[k] for k in ('username', 'date', 'weight', 'height', 'age', 'gender', 'activity', 'goal')] for p in profiles])
+        table = TargetTable()
+        loop, one, batch = timed(per_user, profiles), timed(scalar, profiles), timed(compute_targets, profiles)
+        cold, warm = timed(table.get, repo), timed(table.get, repo)
+        print(f"{n:>7} | {loop:>11.1f} | {one:>9.1f} | {batch:>9.1f} | {cold:>13.1f} | {warm:>13.2f} | {one / n * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sheets import demo_client
+from throttle import Throttle
+
+# The shared client under a traffic spike, raw vs. wrapped in throttle.Throttle:
+#   stampede: N sessions read the profiles tab at the same moment
+#   quota:    N sessions each read a different range against a fake per-window
+#             quota (the window is shrunk from 60 s so the run stays short)
+#   priority: session writes while write-behind threads saturate the write quota
+#             ("no priority" gives the flushers an ordinary thread name)
+#   python benchmarks/bench_throttle.py --sessions 40 --latency 0.05
+
+
+def run_threads(n, fn, name=None):
+    out, errors = [None] * n, []
+    def work(i):
+        t0 = time.perf_counter()
+        try: fn(i)
+        except Exception as e: errors.append(e)
+        out[i] = time.perf_counter() - t0
+    threads = [threading.Thread(target=work, args=(i,), name=name or f"session-{i}") for i in range(n)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return out, errors
+
+
+def make(args, throttled):
+    throttled = throttled != "raw"
+    client = demo_client(latency=args.latency, users=[(f"user{i}", "pw", f"User {i}") for i in range(args.sessions)])
+    throttle = Throttle(quota={'read': args.quota, 'write': args.quota}, burst=args.burst, backoff=0.05, window=args.window)
+    return client, (throttle.wrap(client) if throttled else client), throttle
+
+
+def stampede(args, throttled):
+    client, api, throttle = make(args, throttled)
+    tab = api.open("NutriTrack_Data").worksheet("profiles")
+    client.reset_counters()
+    barrier = threading.Barrier(args.sessions)
+    def read(i):
+        barrier.wait()
+        tab.get_all_values()
+    times, errors = run_threads(args.sessions, read)
+    return client.total_calls(), client.rejected, len(errors), statistics.median(times) * 1000
+
+
+def quota(args, throttled):
+    client, api, throttle = make(args, throttled)
+    tab = api.open("NutriTrack_Data").worksheet("users")
+    client.reset_counters()
+    client.quota, client.window = args.quota, args.window
+    times, errors = run_threads(args.sessions, lambda i: tab.get(f"A{i + 2}:E{i + 2}"))
+    return client.total_calls(), client.rejected, len(errors), statistics.median(times) * 1000
+
+
+def priority(args, throttled):
+    client, api, throttle = make(args, throttled)
+    tab = api.open("NutriTrack_Data").worksheet("Sheet1")
+    stop = threading.Event()
+    def flusher():
+        while not stop.is_set():
+            try: tab.update([["x"]], "Z1")
+            except Exception: time.sleep(0.01)
+    name = "flusher" if throttled == "no priority" else "write-behind"
+    flushers = [threading.Thread(target=flusher, name=name, daemon=True) for _ in range(4)]
+    client.quota, client.window = args.quota, args.window
+    for t in flushers: t.start()
+    time.sleep(args.window)  # let the background writes use up the quota
+    times, errors = run_threads(args.sessions // 4, lambda i: tab.update([["y"]], f"Y{i + 1}"))
+    stop.set()
+    for t in flushers: t.join()
+    return client.total_calls(), client.rejected, len(errors), statistics.median(times) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.05, help="simulated seconds per API call")
+    ap.add_argument("--quota", type=int, default=20, help="calls allowed per window")
+    ap.add_argument("--window", type=float, default=2.0, help="quota window in seconds (60 in production)")
+    ap.add_argument("--burst", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'scenario':>9} | {'client':>11} | {'calls':>6} | {'429s':>6} | {'failed':>6} | {'p50 ms':>8}")
+    for name, fn in (("stampede", stampede), ("quota", quota), ("priority", priority)):
+        for variant in ("raw", "throttled") + (("no priority",) if fn is priority else ()):
+            calls, rejected, failed, ms = fn(args, variant)
+            print(f"{name:>9} | {variant:>11} | {calls:>6} | {rejected:>6} | {failed:>6} | {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
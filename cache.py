@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Process-wide LRU cache with per-entry TTL, shared by every Streamlit session.
+# Concurrent misses on the same key wait for a single load instead of each
+# hitting the Sheets API.
+
+
+class TTLCache:
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = OrderedDict()  # key -> (expires_at, value)
+        self.loading = {}          # key -> Lock held while one caller loads it
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        item = self.data.get(key)
+        if item and item[0] > time.monotonic():
+            self.data.move_to_end(key)
+            return True, item[1]
+        return False, None
+
+    def get(self, key, default=None):
+        with self.lock:
+            found, value = self._lookup(key)
+            if found: self.hits += 1
+            else: self.misses += 1
+            return value if found else default
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize: self.data.popitem(last=False)
+
+    def get_or_load(self, key, loader, ttl=None):
+        with self.lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Someone else may have loaded it while we waited
+            with self.lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+            value = loader()
+            self.set(key, value, ttl)
+            with self.lock:
+                self.loading.pop(key, None)
+            return value
+
+    def invalidate(self, key=None, prefix=None):
+        # No arguments clears everything; prefix matches the head of tuple keys
+        with self.lock:
+            if key is None and prefix is None:
+                self.data.clear()
+                return
+            if key is not None: self.data.pop(key, None)
+            if prefix is not None:
+                n = len(prefix)
+                for k in [k for k in self.data if isinstance(k, tuple) and k[:n] == prefix]:
+                    del self.data[k]
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.data), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
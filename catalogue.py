@@ -0,0 +1,203 @@
+import difflib
+import os
+import sys
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+# Read-only food/exercise catalogue. Columns are NumPy arrays (memory mapped
+# when loaded from disk) kept sorted by lowercased name, so lookups and prefix
+# search are a binary search over the key column -- no per-process index to
+# build, and only the pages actually touched are read from disk.
+
+# Built-in sample data, used when no catalogue file is configured
+DEFAULT_FOODS = [
+    # Macros are grams per unit
+    {'name': 'Oatmeal & Berries', 'cal_per_unit': 350, 'unit': 'Bowl', 'type': 'Breakfast', 'protein': 10, 'carbs': 60, 'fat': 7, 'fiber': 8, 'sugar': 15},
+    {'name': 'Egg White Omelet', 'cal_per_unit': 250, 'unit': 'Serving', 'type': 'Breakfast', 'protein': 26, 'carbs': 6, 'fat': 12, 'fiber': 1, 'sugar': 2},
+    {'name': 'Avocado Toast', 'cal_per_unit': 400, 'unit': 'Slice', 'type': 'Breakfast', 'protein': 10, 'carbs': 38, 'fat': 24, 'fiber': 10, 'sugar': 3},
+    {'name': 'Greek Yogurt Parfait', 'cal_per_unit': 300, 'unit': 'Bowl', 'type': 'Breakfast', 'protein': 18, 'carbs': 40, 'fat': 7, 'fiber': 3, 'sugar': 25},
+
+    {'name': 'Grilled Chicken Salad', 'cal_per_unit': 450, 'unit': 'Bowl', 'type': 'Lunch', 'protein': 40, 'carbs': 15, 'fat': 25, 'fiber': 5, 'sugar': 6},
+    {'name': 'Quinoa Power Bowl', 'cal_per_unit': 500, 'unit': 'Bowl', 'type': 'Lunch', 'protein': 18, 'carbs': 70, 'fat': 16, 'fiber': 10, 'sugar': 8},
+    {'name': 'Turkey Wrap', 'cal_per_unit': 400, 'unit': 'Wrap', 'type': 'Lunch', 'protein': 28, 'carbs': 40, 'fat': 13, 'fiber': 4, 'sugar': 4},
+    {'name': 'Tuna Salad', 'cal_per_unit': 350, 'unit': 'Serving', 'type': 'Lunch', 'protein': 30, 'carbs': 8, 'fat': 22, 'fiber': 2, 'sugar': 3},
+
+    {'name': 'Grilled Salmon', 'cal_per_unit': 600, 'unit': 'Fillet', 'type': 'Dinner', 'protein': 45, 'carbs': 10, 'fat': 40, 'fiber': 2, 'sugar': 2},
+    {'name': 'Lean Steak & Veg', 'cal_per_unit': 700, 'unit': 'Plate', 'type': 'Dinner', 'protein': 55, 'carbs': 30, 'fat': 38, 'fiber': 6, 'sugar': 8},
+    {'name': 'Veggie Stir Fry', 'cal_per_unit': 550, 'unit': 'Bowl', 'type': 'Dinner', 'protein': 15, 'carbs': 75, 'fat': 20, 'fiber': 9, 'sugar': 14},
+    {'name': 'Baked Cod', 'cal_per_unit': 500, 'unit': 'Fillet', 'type': 'Dinner', 'protein': 45, 'carbs': 35, 'fat': 18, 'fiber': 4, 'sugar': 4},
+
+    {'name': 'Protein Shake', 'cal_per_unit': 180, 'unit': 'Bottle', 'type': 'Snack', 'protein': 30, 'carbs': 8, 'fat': 3, 'fiber': 1, 'sugar': 3},
+    {'name': 'Almonds', 'cal_per_unit': 170, 'unit': '30g', 'type': 'Snack', 'protein': 6, 'carbs': 6, 'fat': 15, 'fiber': 3.5, 'sugar': 1.2},
+    {'name': 'Apple', 'cal_per_unit': 80, 'unit': 'Piece', 'type': 'Snack', 'protein': 0.4, 'carbs': 21, 'fat': 0.3, 'fiber': 4, 'sugar': 16},
+    {'name': 'Hummus & Carrots', 'cal_per_unit': 200, 'unit': 'Serving', 'type': 'Snack', 'protein': 6, 'carbs': 22, 'fat': 10, 'fiber': 7, 'sugar': 7}
+]
+
+DEFAULT_EXERCISES = [
+    {'name': 'Running (Moderate)', 'cal_per_min': 10},
+    {'name': 'Running (Fast)', 'cal_per_min': 14},
+    {'name': 'Cycling', 'cal_per_min': 8},
+    {'name': 'Swimming', 'cal_per_min': 9},
+    {'name': 'Weight Lifting', 'cal_per_min': 4},
+    {'name': 'Yoga', 'cal_per_min': 3},
+    {'name': 'HIIT', 'cal_per_min': 12},
+    {'name': 'Walking (Brisk)', 'cal_per_min': 5},
+    {'name': 'Hiking', 'cal_per_min': 6}
+]
+
+# Fixed-width byte strings keep the on-disk file compact (UTF-8, not UTF-32)
+TEXT_WIDTHS = {'name': 96, 'key': 96, 'unit': 24, 'type': 16}
+
+
+def as_text(values):
+    values = np.asarray(values)
+    return np.char.decode(values, 'utf-8') if values.dtype.kind == 'S' else values
+
+
+def _scalar(v):
+    if isinstance(v, bytes): return v.decode('utf-8')
+    return v.item() if hasattr(v, 'item') else v
+
+
+def _sorted_columns(df):
+    # Rows ordered by lowercased name, which doubles as the lookup/search index
+    df = df.assign(key=df['name'].astype(str).str.lower()).sort_values('key', kind='stable')
+    return {
+        c: df[c].to_numpy() if df[c].dtype.kind in 'iufb' else df[c].fillna('').astype(str).to_numpy(dtype=str)
+        for c in df.columns
+    }
+
+
+class Catalogue:
+    def __init__(self, columns):
+        # columns: {name: 1-d array} sorted by the lowercased-name 'key' column,
+        # e.g. the .npy column files written by save_catalogue()
+        self.columns = columns
+        self.names = columns['name']
+        self.keys = columns['key']
+        self.bytes_keys = self.keys.dtype.kind == 'S'
+        self.found = {}  # name -> row memo, so repeat lookups are a dict hit
+        self.search = lru_cache(maxsize=256)(self._search)
+
+    @classmethod
+    def from_records(cls, records):
+        import pandas as pd
+        return cls.from_frame(pd.DataFrame(records))
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(_sorted_columns(df))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.row(name) is not None
+
+    @cached_property
+    def options(self):
+        return tuple(as_text(self.names).tolist())
+
+    @cached_property
+    def words(self):
+        # (sorted words and whole names, row of each, distinct ones) for the typo
+        # fallback; built on the first miss rather than at load
+        pairs = sorted((w, i) for i, key in enumerate(as_text(self.keys).tolist()) for w in set(key.split()) | {key})
+        words = np.array([w for w, _ in pairs])
+        return words, np.array([i for _, i in pairs], dtype=np.int64), np.unique(words).tolist()
+
+    def _key(self, text):
+        text = text.lower()
+        return text.encode('utf-8') if self.bytes_keys else text
+
+    def _span(self, start, stop):
+        return np.searchsorted(self.keys, start, 'left'), np.searchsorted(self.keys, stop, 'left')
+
+    def row(self, name):
+        if name in self.found: return self.found[name]
+        if not isinstance(name, str): return None
+        k = self._key(name)
+        lo, hi = np.searchsorted(self.keys, k, 'left'), np.searchsorted(self.keys, k, 'right')
+        for i in range(lo, hi):
+            if _scalar(self.names[i]) == name:
+                self.found[name] = int(i)
+                return int(i)
+        return None
+
+    def get(self, name, column, default=None):
+        # Older catalogue files may lack a column (e.g. macros); treat it as missing
+        i = self.row(name)
+        return default if i is None or column not in self.columns else _scalar(self.columns[column][i])
+
+    def record(self, name):
+        i = self.row(name)
+        if i is None: return None
+        return {c: _scalar(v[i]) for c, v in self.columns.items() if c != 'key'}
+
+    def _search(self, query, limit=50):
+        q = query.strip()
+        if not q: return [_scalar(n) for n in self.names[:limit]]
+        k = self._key(q)
+        top = b'\xff' if self.bytes_keys else '\uffff'
+
+        # Names starting with the query, then names containing it
+        lo, hi = self._span(k, k + top)
+        rows = list(range(lo, min(hi, lo + limit)))
+        if len(rows) < limit:
+            inside = np.flatnonzero(np.char.find(self.keys, k) > 0)
+            rows += inside[:limit - len(rows)].tolist()
+        if not rows:
+            # Nothing matched; fall back to spelling-tolerant matching on
+            # names and the words in them, closest first
+            words, word_rows, vocab = self.words
+            seen = set()
+            for w in difflib.get_close_matches(q.lower(), vocab, n=limit, cutoff=0.6):
+                lo, hi = np.searchsorted(words, w, 'left'), np.searchsorted(words, w, 'right')
+                for i in word_rows[lo:min(hi, lo + limit)].tolist():
+                    if i not in seen:
+                        seen.add(i)
+                        rows.append(i)
+                if len(rows) >= limit: break
+            rows = rows[:limit]
+        return [_scalar(self.names[i]) for i in rows]
+
+
+# --- On-disk catalogues ---
+# A catalogue on disk is either a directory with one .npy file per column
+# (opened with mmap_mode, so only the pages we touch are read and every
+# process shares them through the OS page cache) or a Parquet file (needs
+# pyarrow, loaded into memory). `python catalogue.py build foods.csv data/foods`
+# converts a CSV/Parquet export into the .npy directory format.
+
+def save_catalogue(df, path):
+    os.makedirs(path, exist_ok=True)
+    for c, values in _sorted_columns(df).items():
+        if values.dtype.kind in 'iufb':
+            values = np.nan_to_num(values.astype('f4'))
+        else:
+            # UTF-8 bytes, trimmed to the field width without splitting a character
+            width = TEXT_WIDTHS.get(c, 32)
+            values = np.array([v.encode('utf-8')[:width].decode('utf-8', 'ignore').encode('utf-8') for v in values], dtype=f"S{width}")
+        np.save(os.path.join(path, f"{c}.npy"), values)
+
+
+def load_catalogue(path):
+    if path.endswith('.parquet'):
+        import pandas as pd
+        return Catalogue.from_frame(pd.read_parquet(path))
+    columns = {
+        f[:-4]: np.load(os.path.join(path, f), mmap_mode='r') for f in sorted(os.listdir(path)) if f.endswith('.npy')
+    }
+    if 'key' not in columns: raise ValueError(f"{path} has no key.npy; rebuild it with save_catalogue()")
+    return Catalogue(columns)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        sys.exit("usage: python catalogue.py build <foods.csv|foods.parquet> <out_dir>")
+    import pandas as pd
+    src, dst = sys.argv[2], sys.argv[3]
+    df = pd.read_parquet(src) if src.endswith('.parquet') else pd.read_csv(src)
+    save_catalogue(df, dst)
+    print(f"Wrote {len(df)} rows to {dst}")
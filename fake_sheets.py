@@ -0,0 +1,278 @@
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# In-memory stand-in for the subset of gspread that app.py uses.
+# Every call is counted (with the number of rows it moved) and can be slowed
+# down with a fixed + per-row latency so benchmarks see realistic costs.
+
+_A1 = re.compile(r"^(?:.*!)?([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def col_to_num(col):
+    n = 0
+    for ch in col:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def num_to_col(n):
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def parse_a1(rng):
+    # -> (first_row, first_col, last_row, last_col); open ends are None
+    m = _A1.match(rng.replace("'", "").replace("$", ""))
+    if not m: raise ValueError(f"Bad range: {rng}")
+    c1, r1, c2, r2 = m.groups()
+    if c2 is None and r2 is None: c2, r2 = c1, r1
+    return (
+        int(r1) if r1 else 1, col_to_num(c1) if c1 else 1,
+        int(r2) if r2 else None, col_to_num(c2) if c2 else None,
+    )
+
+
+def numericise(value):
+    if isinstance(value, str) and value.strip():
+        try: return int(value)
+        except ValueError: pass
+        try: return float(value)
+        except ValueError: pass
+    return value
+
+
+class _Op:
+    rows = 0
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code, message=""):
+        super().__init__(f"APIError: [{code}]: {message}")
+        self.code = code
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, sheet_id, rows=None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self._rows = [[str(v) for v in r] for r in rows or []]
+
+    @property
+    def row_count(self):
+        return len(self._rows)
+
+    def _op(self, name):
+        return self.spreadsheet.client.op(f"{self.title}.{name}")
+
+    def _slice(self, rng):
+        r1, c1, r2, c2 = parse_a1(rng)
+        r2 = min(r2 or len(self._rows), len(self._rows))
+        out = []
+        for r in self._rows[r1 - 1:r2]:
+            cells = r[c1 - 1:c2] if c2 else r[c1 - 1:]
+            out.append(list(cells))
+        while out and not any(out[-1]): out.pop()
+        return out
+
+    def _write(self, r1, c1, values):
+        for i, row in enumerate(values):
+            idx = r1 - 1 + i
+            while len(self._rows) <= idx: self._rows.append([])
+            cur = self._rows[idx]
+            need = c1 - 1 + len(row)
+            if len(cur) < need: cur.extend([""] * (need - len(cur)))
+            for j, v in enumerate(row):
+                cur[c1 - 1 + j] = "" if v is None else str(v)
+
+    # --- reads ---
+    def get_all_values(self):
+        with self._op("get_all_values") as op:
+            op.rows = len(self._rows)
+            width = max((len(r) for r in self._rows), default=0)
+            return [r + [""] * (width - len(r)) for r in self._rows]
+
+    def get_all_records(self):
+        with self._op("get_all_records") as op:
+            op.rows = len(self._rows)
+            if not self._rows: return []
+            header = self._rows[0]
+            return [
+                {h: numericise(r[i] if i < len(r) else "") for i, h in enumerate(header)}
+                for r in self._rows[1:]
+            ]
+
+    def get(self, range_name):
+        with self._op("get") as op:
+            out = self._slice(range_name)
+            op.rows = len(out)
+            return out
+
+    def batch_get(self, ranges):
+        with self._op("batch_get") as op:
+            out = [self._slice(r) for r in ranges]
+            op.rows = sum(len(o) for o in out)
+            return out
+
+    def row_values(self, row):
+        with self._op("row_values") as op:
+            op.rows = 1
+            return list(self._rows[row - 1]) if row <= len(self._rows) else []
+
+    def col_values(self, col):
+        with self._op("col_values") as op:
+            op.rows = len(self._rows)
+            out = [r[col - 1] if col <= len(r) else "" for r in self._rows]
+            while out and not out[-1]: out.pop()
+            return out
+
+    # --- writes ---
+    def append_row(self, values, **kwargs):
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        with self._op("append_rows") as op:
+            op.rows = len(values)
+            while self._rows and not any(self._rows[-1]): self._rows.pop()
+            start = len(self._rows) + 1
+            self._write(start, 1, values)
+            end = start + len(values) - 1
+            width = max((len(v) for v in values), default=1)
+            return {"updates": {"updatedRange": f"'{self.title}'!A{start}:{num_to_col(width)}{end}",
+                                "updatedRows": len(values)}}
+
+    def update(self, values=None, range_name=None, **kwargs):
+        if isinstance(values, str): values, range_name = range_name, values  # gspread 5 order
+        with self._op("update") as op:
+            op.rows = len(values)
+            r1, c1, _, _ = parse_a1(range_name or "A1")
+            self._write(r1, c1, values)
+            return {"updatedRows": len(values)}
+
+    def batch_update(self, data, **kwargs):
+        with self._op("batch_update") as op:
+            op.rows = sum(len(d["values"]) for d in data)
+            for d in data:
+                r1, c1, _, _ = parse_a1(d["range"])
+                self._write(r1, c1, d["values"])
+            return {"totalUpdatedRows": sum(len(d["values"]) for d in data)}
+
+    def update_cell(self, row, col, value):
+        with self._op("update_cell") as op:
+            op.rows = 1
+            self._write(row, col, [[value]])
+
+    def delete_rows(self, start_index, end_index=None):
+        with self._op("delete_rows") as op:
+            end_index = end_index or start_index
+            op.rows = end_index - start_index + 1
+            del self._rows[start_index - 1:end_index]
+
+    def clear(self):
+        with self._op("clear"):
+            self._rows = []
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.id = f"fake-{title}"
+        self._sheets = {}
+
+    def add_worksheet(self, title, rows=None, cols=None, **kwargs):
+        ws = FakeWorksheet(self, title, len(self._sheets), rows if isinstance(rows, list) else None)
+        self._sheets[title] = ws
+        return ws
+
+    def worksheet(self, title):
+        with self.client.op("worksheet"): pass
+        if title not in self._sheets: raise FakeAPIError(404, f"Worksheet {title} not found")
+        return self._sheets[title]
+
+    def worksheets(self):
+        with self.client.op("worksheets"): pass
+        return list(self._sheets.values())
+
+    def batch_update(self, body):
+        with self.client.op("spreadsheet.batch_update") as op:
+            op.rows = len(body.get("requests", []))
+            by_id = {ws.id: ws for ws in self._sheets.values()}
+            for req in body.get("requests", []):
+                rng = req.get("deleteDimension", {}).get("range")
+                if rng and rng.get("dimension") == "ROWS":
+                    del by_id[rng["sheetId"]]._rows[rng["startIndex"]:rng["endIndex"]]
+            return {"replies": [{} for _ in body.get("requests", [])]}
+
+
+class FakeClient:
+    def __init__(self, latency=0.0, per_row=0.0):
+        self.latency = latency
+        self.per_row = per_row
+        self.lock = threading.RLock()
+        self.calls = {}
+        self.thread_calls = {}  # thread name -> calls, to tell foreground from background work
+        self.rows_moved = 0
+        self.rejected = 0
+        self.quota = None      # calls allowed per `window` seconds; beyond that -> 429
+        self.window = 60.0
+        self._stamps = deque()
+        self._files = {}
+
+    @contextmanager
+    def op(self, name):
+        # Runs the body under the lock, then sleeps outside it so concurrent
+        # callers overlap their simulated network time like real requests.
+        op = _Op()
+        with self.lock:
+            if self.quota:
+                now = time.monotonic()
+                while self._stamps and self._stamps[0] <= now - self.window: self._stamps.popleft()
+                if len(self._stamps) >= self.quota:
+                    self.rejected += 1
+                    raise FakeAPIError(429, "Quota exceeded")
+                self._stamps.append(now)
+            yield op
+            self.calls[name] = self.calls.get(name, 0) + 1
+            thread = threading.current_thread().name
+            self.thread_calls[thread] = self.thread_calls.get(thread, 0) + 1
+            self.rows_moved += op.rows
+        delay = self.latency + self.per_row * op.rows
+        if delay: time.sleep(delay)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset_counters(self):
+        self.calls = {}
+        self.thread_calls = {}
+        self.rows_moved = 0
+        self.rejected = 0
+
+    def create(self, title):
+        self._files[title] = FakeSpreadsheet(self, title)
+        return self._files[title]
+
+    def open(self, title):
+        with self.op("open"): pass
+        if title not in self._files: raise FakeAPIError(404, f"Spreadsheet {title} not found")
+        return self._files[title]
+
+
+def demo_client(latency=0.0, per_row=0.0, users=()):
+    # A client with an empty NutriTrack_Data book, for running the app or load
+    # tests offline; users: (username, password, name) tuples, pre-approved
+    from accounts import PROFILE_HEADER, USER_HEADER
+    from sheet_sync import LOG_HEADER
+    client = FakeClient(latency, per_row)
+    book = client.create("NutriTrack_Data")
+    book.add_worksheet("users", rows=[list(USER_HEADER)] + [[u, p, n, "2020-01-01", "approved"] for u, p, n in users])
+    book.add_worksheet("profiles", rows=[list(PROFILE_HEADER)])
+    book.add_worksheet("Sheet1", rows=[list(LOG_HEADER)])
+    return client
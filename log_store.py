@@ -0,0 +1,99 @@
+import uuid
+
+from nutrition import MACROS, daily_totals, day_totals
+
+# Per-user food/exercise log held in session_state, indexed by date so the
+# tracker only ever touches the entries of the day it is showing. Per-day
+# totals are one vectorized group-by, redone only after the log changes.
+# Every entry has a stable `entry_id`, so edits are saved row by row.
+
+
+def new_entry_id():
+    return uuid.uuid4().hex[:12]
+
+
+class LogStore:
+    def __init__(self, username=None, entries=(), start=None):
+        self.username = username
+        self.days = {}
+        self._daily = None
+        self.start = start     # first date loaded at login; None when everything is
+        self.fetched = set()   # older days loaded on demand
+        for e in entries: self.add(e)
+
+    def add(self, entry):
+        entry['date'] = str(entry['date'])
+        entry['username'] = self.username
+        if not entry.get('entry_id'): entry['entry_id'] = new_entry_id()
+        self.days.setdefault(entry['date'], []).append(entry)
+        self._daily = None
+
+    def day(self, date_str):
+        return self.days.get(date_str, [])
+
+    def ensure_day(self, date_str, load):
+        # Days before the login window are read with load() the first time they're shown
+        if self.start and date_str < self.start and date_str not in self.fetched:
+            self.days.pop(date_str, None)
+            self._daily = None
+            for e in load(): self.add(e)
+            self.fetched.add(date_str)
+
+    def apply(self, changes):
+        # changes: [(before, after)] matched on entry_id; before None adds,
+        # after None removes, otherwise the entry is replaced where it stands
+        for before, after in changes:
+            if before is None:
+                self.add(after)
+                continue
+            day = self.days.get(str(before['date']), [])
+            i = next((i for i, e in enumerate(day) if e['entry_id'] == before['entry_id']), None)
+            if i is None: continue
+            if after is None: del day[i]
+            else: day[i] = {**after, 'date': str(after['date']), 'username': self.username}
+        self._daily = None
+
+    def daily(self):
+        # -> DataFrame of food/exercise calories and macros per day (see nutrition.py)
+        if self._daily is None: self._daily = daily_totals(self)
+        return self._daily
+
+    def totals(self, date_str):
+        # -> {'food', 'exercise', macro...: total} for one day
+        return day_totals(self.daily(), date_str)
+
+    def dates(self):
+        return sorted(self.days)
+
+    def __iter__(self):
+        for d in self.dates(): yield from self.days[d]
+
+    def __len__(self):
+        return sum(len(v) for v in self.days.values())
+
+
+def _cell(value):
+    # data_editor sends None for cleared cells and may send NaN for numbers
+    return None if value is None or value != value else value
+
+
+def editor_changes(entries, delta, date_str):
+    # st.data_editor's widget state over a table of `entries` ({'edited_rows':
+    # {position: {column: value}}, 'added_rows': [...], 'deleted_rows': [...]})
+    # -> [(before, after)] with positions resolved to entries and their ids
+    changes, deleted = [], {int(p) for p in delta.get('deleted_rows', [])}
+    for pos, cols in delta.get('edited_rows', {}).items():
+        pos = int(pos)
+        if pos in deleted or pos >= len(entries): continue
+        before = entries[pos]
+        after = {**before, **{k: _cell(v) for k, v in cols.items() if _cell(v) is not None}}  # cleared cells keep their value
+        if after != before: changes.append((before, after))
+    changes += [(entries[p], None) for p in sorted(deleted) if p < len(entries)]
+    for cols in delta.get('added_rows', []):
+        cols = {k: _cell(v) for k, v in cols.items() if _cell(v) is not None}
+        if not str(cols.get('name') or '').strip(): continue  # rows left blank are ignored
+        changes.append((None, {
+            'date': date_str, 'cal': 0.0, 'type': 'Manual', 'amount': 1.0, 'unit': '',
+            **{m: 0.0 for m in MACROS}, **cols, 'entry_id': new_entry_id()
+        }))
+    return changes
@@ -0,0 +1,182 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+
+from proxy import Proxies
+
+# Process-wide counters for Google Sheets API calls and page renders: call
+# counts, latency histograms, rows moved and errors per operation, plus a
+# rolling per-minute call count to compare against the Sheets quota.
+# trace(client) wraps a gspread client so every call made through it (and
+# through the spreadsheets/worksheets it hands out) is recorded.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Sheets API per-minute limits for one user (the service account) per project
+QUOTA_PER_MINUTE = {'read': 60, 'write': 60}
+WRITE_METHODS = {
+    'append_row', 'append_rows', 'update', 'batch_update', 'update_cell', 'update_cells',
+    'delete_rows', 'insert_rows', 'clear', 'batch_clear', 'add_worksheet', 'del_worksheet'
+}
+
+
+class _Stat:
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.errors = {}  # error code -> count
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile, capped at the max seen
+        need, seen = q / 100 * self.calls, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= need: return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return 0.0
+
+
+def error_code(err):
+    # gspread's APIError (and the fake) carry the HTTP status as .code
+    return str(getattr(err, 'code', None) or type(err).__name__)
+
+
+def payload_rows(method, args, kwargs, result):
+    # Rows sent for writes, rows received for reads
+    try:
+        if method in ('append_rows', 'update'):
+            values = kwargs.get('values', args[0] if args else None)
+            if isinstance(values, str): values = args[1] if len(args) > 1 else kwargs.get('range_name') # gspread 5 order
+            return len(values or [])
+        if method == 'append_row': return 1
+        if method == 'batch_update' and args and isinstance(args[0], list): return sum(len(d.get('values', [])) for d in args[0])
+        if method == 'batch_get': return sum(len(r) for r in result)
+        if isinstance(result, list): return len(result)
+    except (TypeError, AttributeError): pass
+    return 0
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}  # (family, name) -> _Stat
+        self.recent = {k: deque() for k in QUOTA_PER_MINUTE}  # call timestamps in the last minute
+        self.proxies = Proxies(self._call)
+        self.started = time.time()
+        self.last_write = 0.0
+
+    def observe(self, family, name, seconds, rows=0, error=None, kind=None):
+        now = time.monotonic()
+        with self.lock:
+            stat = self.stats.get((family, name))
+            if stat is None: stat = self.stats[(family, name)] = _Stat()
+            stat.calls += 1
+            stat.rows += rows
+            stat.seconds += seconds
+            stat.max = max(stat.max, seconds)
+            stat.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            if error is not None: stat.errors[error] = stat.errors.get(error, 0) + 1
+            if kind:
+                q = self.recent[kind]
+                q.append(now)
+                while q and q[0] < now - 60: q.popleft()
+
+    def per_minute(self):
+        now = time.monotonic()
+        with self.lock:
+            for q in self.recent.values():
+                while q and q[0] < now - 60: q.popleft()
+            return {k: len(q) for k, q in self.recent.items()}
+
+    def trace(self, client):
+        return self.proxies.wrap(client)
+
+    def _call(self, key, method, fn, args, kwargs):
+        # Worksheet calls are named after their tab, spreadsheet calls just "spreadsheet"
+        op = f"{key[1] if key[0] == 'ws' else key[0]}.{method}"
+        kind = 'write' if method in WRITE_METHODS else 'read'
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.observe("sheets", op, time.perf_counter() - t0, error=error_code(e), kind=kind)
+            raise
+        self.observe("sheets", op, time.perf_counter() - t0, payload_rows(method, args, kwargs, result), kind=kind)
+        return result
+
+    def table(self, family):
+        with self.lock:
+            rows = []
+            for (fam, name), s in sorted(self.stats.items()):
+                if fam != family: continue
+                rows.append({
+                    'operation': name, 'calls': s.calls, 'errors': sum(s.errors.values()),
+                    'error codes': ", ".join(f"{c}×{n}" for c, n in sorted(s.errors.items())),
+                    'rows': s.rows, 'mean ms': s.seconds / s.calls * 1000,
+                    'p95 ms': s.percentile(95) * 1000, 'max ms': s.max * 1000
+                })
+            return rows
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            for q in self.recent.values(): q.clear()
+            self.started = time.time()
+
+    def render(self, caches=None):
+        # Prometheus text exposition format
+        per_minute = self.per_minute()
+        out = []
+        def family(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+        with self.lock:
+            items = sorted(self.stats.items())
+            for fam, label in (("sheets", "op"), ("page", "page")):
+                stats = [(n, s) for (f, n), s in items if f == fam]
+                prefix = f"nutritrack_{fam}"
+                family(f"{prefix}_seconds", "histogram", "Google Sheets API call latency" if fam == "sheets" else "Page render time")
+                for name, s in stats:
+                    lbl = f'{label}="{_escape(name)}"'
+                    seen = 0
+                    for bound, n in zip(BUCKETS + ("+Inf",), s.buckets):
+                        seen += n
+                        out.append(f'{prefix}_seconds_bucket{{{lbl},le="{bound}"}} {seen}')
+                    out.append(f"{prefix}_seconds_sum{{{lbl}}} {s.seconds:.6f}")
+                    out.append(f"{prefix}_seconds_count{{{lbl}}} {s.calls}")
+                if fam != "sheets": continue
+                family(f"{prefix}_rows_total", "counter", "Rows sent or received by Google Sheets API calls")
+                for name, s in stats: out.append(f'{prefix}_rows_total{{{label}="{_escape(name)}"}} {s.rows}')
+                family(f"{prefix}_errors_total", "counter", "Failed Google Sheets API calls by error code")
+                for name, s in stats:
+                    for code, n in sorted(s.errors.items()):
+                        out.append(f'{prefix}_errors_total{{{label}="{_escape(name)}",code="{_escape(code)}"}} {n}')
+        family("nutritrack_sheets_calls_last_minute", "gauge", "Google Sheets API calls in the last 60 seconds")
+        for kind, n in per_minute.items(): out.append(f'nutritrack_sheets_calls_last_minute{{kind="{kind}"}} {n}')
+        family("nutritrack_sheets_quota_per_minute", "gauge", "Google Sheets API per-minute quota")
+        for kind, n in QUOTA_PER_MINUTE.items(): out.append(f'nutritrack_sheets_quota_per_minute{{kind="{kind}"}} {n}')
+        if caches:
+            stats = {name: c.stats() for name, c in caches.items()}
+            for key, kind in (("hits", "counter"), ("misses", "counter"), ("entries", "gauge")):
+                name = f"nutritrack_cache_{key}" + ("_total" if kind == "counter" else "")
+                family(name, kind, f"Shared cache {key}")
+                for cache, s in stats.items(): out.append(f'{name}{{cache="{cache}"}} {s[key]}')
+        return "\n".join(out) + "\n"
+
+    def write(self, path, caches=None, every=15.0):
+        # For node_exporter's textfile collector; rate limited, replaced atomically
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_write < every: return False
+            self.last_write = now
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f: f.write(self.render(caches))
+        os.replace(tmp, path)
+        return True
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
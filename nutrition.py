@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Macro-nutrients tracked per catalogue unit and per log entry (grams), the
+# daily targets derived from the user's goals, and the columnar per-day
+# aggregation behind the tracker metrics.
+
+MACROS = ['protein', 'carbs', 'fat', 'fiber', 'sugar']
+KCAL_PER_GRAM = {'protein': 4, 'carbs': 4, 'fat': 9}
+
+# Share of daily calories from each energy macro, the sugar ceiling as a share
+# of calories and fiber in grams per 1000 kcal
+DEFAULT_SPLIT = {'protein': 0.20, 'carbs': 0.50, 'fat': 0.30, 'sugar': 0.10, 'fiber': 14}
+
+GOAL_SPLITS = {
+    "Lose Weight (Slow)": {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30},
+    "Lose Weight (Standard)": {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30},
+    "Lose Weight (Aggressive)": {'protein': 0.35, 'carbs': 0.35, 'fat': 0.30},
+    "Build Muscle (Lean)": {'protein': 0.30, 'carbs': 0.45, 'fat': 0.25},
+    "Build Muscle (Bulk)": {'protein': 0.25, 'carbs': 0.50, 'fat': 0.25},
+    "Marathon Training": {'protein': 0.15, 'carbs': 0.60, 'fat': 0.25},
+    "Triathlon Training": {'protein': 0.15, 'carbs': 0.60, 'fat': 0.25},
+    "HIIT Performance": {'protein': 0.25, 'carbs': 0.50, 'fat': 0.25},
+    "Diabetes (Low Sugar)": {'protein': 0.25, 'carbs': 0.40, 'fat': 0.35, 'sugar': 0.05, 'fiber': 18},
+    "Heart Health": {'protein': 0.20, 'carbs': 0.55, 'fat': 0.25, 'fiber': 18},
+    "PCOS": {'protein': 0.25, 'carbs': 0.40, 'fat': 0.35, 'sugar': 0.05},
+    "Pregnancy": {'protein': 0.25, 'carbs': 0.45, 'fat': 0.30}
+}
+
+
+def macro_split(goals):
+    # Later goals override earlier ones, but the strictest sugar limit always wins
+    if isinstance(goals, str): goals = [goals]
+    split = dict(DEFAULT_SPLIT)
+    for g in goals: split.update(GOAL_SPLITS.get(g, {}))
+    split['sugar'] = min([DEFAULT_SPLIT['sugar']] + [GOAL_SPLITS.get(g, {}).get('sugar', 1) for g in goals])
+    return split
+
+
+def macro_targets(target_kcal, goals):
+    # -> {macro: grams per day}; sugar is an upper limit, the rest are goals
+    split = macro_split(goals)
+    out = {m: target_kcal * split[m] / KCAL_PER_GRAM[m] for m in KCAL_PER_GRAM}
+    out['fiber'] = target_kcal / 1000 * split['fiber']
+    out['sugar'] = target_kcal * split['sugar'] / 4
+    return {m: round(out[m]) for m in MACROS}
+
+
+# --- Per-day aggregation ---
+DAILY_COLUMNS = ['food', 'exercise'] + MACROS
+
+
+def daily_totals(entries):
+    # -> DataFrame indexed by every day from the first to the last logged one,
+    # with food/exercise calories and macro grams summed per day
+    df = pd.DataFrame(list(entries), columns=['date', 'type', 'cal'] + MACROS)
+    if df.empty: return pd.DataFrame(columns=DAILY_COLUMNS, index=pd.DatetimeIndex([], name='date'), dtype=float)
+    values = df[['cal'] + MACROS].apply(pd.to_numeric, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    food = (df['type'] == 'Manual').to_numpy()
+    burn = (df['type'] == 'Exercise').to_numpy()
+    out = pd.DataFrame(
+        np.column_stack([values[:, 0] * food, values[:, 0] * burn, values[:, 1:] * food[:, None]]),
+        columns=DAILY_COLUMNS, index=pd.to_datetime(df['date'], errors='coerce')
+    )
+    out = out[out.index.notna()].groupby(level=0).sum()
+    out.index.name = 'date'
+    return out.asfreq('D', fill_value=0.0)
+
+
+def day_totals(daily, date):
+    # -> {column: total} for one day, zeros when nothing was logged
+    ts = pd.Timestamp(date)
+    row = daily.loc[ts] if ts in daily.index else pd.Series(0.0, index=DAILY_COLUMNS)
+    return row.to_dict()
+
+
+def rolling_totals(daily, window=7, end=None, how='mean'):
+    # Trailing `window`-day sums or means per day, extended through `end` so
+    # quiet days at the end of the log still count
+    if end is not None:
+        end = pd.Timestamp(end)
+        start = min(daily.index[0], end) if len(daily) else end
+        daily = daily.reindex(pd.date_range(start, end, freq='D', name='date'), fill_value=0.0)
+    return getattr(daily.rolling(window, min_periods=1), how)()
@@ -0,0 +1,91 @@
+import itertools
+
+import numpy as np
+
+from catalogue import as_text
+
+# Meal plan engine. The food table is turned into per-type NumPy arrays once;
+# generate() then draws every day of the plan in one vectorized pass and picks
+# main-meal portions plus a snack top-up that land close to the target.
+
+MAIN_MEALS = ['Breakfast', 'Lunch', 'Dinner']
+PORTIONS = (1.0, 1.5, 2.0)
+
+
+class MealPlanner:
+    def __init__(self, food_db, portions=PORTIONS, max_snacks=3, snack_pool=16, candidates=64):
+        # food_db: anything indexable by column name (DataFrame, Catalogue.columns, ...)
+        self.portions = np.asarray(portions, dtype=float)
+        self.candidates = candidates
+        self.meals = {}
+        types = as_text(food_db['type'])
+        for t in MAIN_MEALS + ['Snack']:
+            rows = np.flatnonzero(types == t)
+            if t == 'Snack' and len(rows) > snack_pool:
+                # Keep the snack combination table small: pick snacks spread
+                # evenly across the calorie range
+                cal = np.asarray(food_db['cal_per_unit'], dtype=float)[rows]
+                rows = rows[np.argsort(cal, kind='stable')[np.linspace(0, len(rows) - 1, snack_pool).astype(int)]]
+            self.meals[t] = (
+                as_text(np.asarray(food_db['name'])[rows]),
+                np.asarray(food_db['cal_per_unit'], dtype=float)[rows],
+                as_text(np.asarray(food_db['unit'])[rows])
+            )
+        self.main_types = [t for t in MAIN_MEALS if len(self.meals[t][0])]
+
+        # Every multiset of up to max_snacks snacks, sorted by calories, so the
+        # best top-up for any remainder is one searchsorted away
+        n_snacks = len(self.meals['Snack'][0])
+        combos = [()]
+        for k in range(1, max_snacks + 1 if n_snacks else 1):
+            combos += list(itertools.combinations_with_replacement(range(n_snacks), k))
+        totals = np.array([self.meals['Snack'][1][list(c)].sum() if c else 0.0 for c in combos])
+        order = np.argsort(totals, kind='stable')
+        self.snack_combos = [combos[i] for i in order]
+        self.snack_totals = totals[order]
+
+    def generate(self, days, target, tolerance=100, seed=None):
+        rng = np.random.default_rng(seed)
+        k, m = self.candidates, len(self.main_types)
+
+        # (days, k, meals) random picks and portions for each main meal
+        picks = np.zeros((days, k, m), dtype=int)
+        cals = np.zeros((days, k, m))
+        for i, t in enumerate(self.main_types):
+            picks[..., i] = rng.integers(0, len(self.meals[t][0]), size=(days, k))
+            cals[..., i] = self.meals[t][1][picks[..., i]]
+        portions = self.portions[rng.integers(0, len(self.portions), size=(days, k, m))]
+        mains = (cals * portions).sum(axis=-1)
+
+        # Closest snack top-up for each candidate's remainder
+        remainder = target - mains
+        hi = np.clip(np.searchsorted(self.snack_totals, remainder), 0, len(self.snack_totals) - 1)
+        lo = np.clip(hi - 1, 0, None)
+        use_lo = np.abs(remainder - self.snack_totals[lo]) <= np.abs(remainder - self.snack_totals[hi])
+        snack = np.where(use_lo, lo, hi)
+        error = np.abs(remainder - self.snack_totals[snack])
+
+        # Candidates are already random, so the first one within tolerance keeps
+        # variety; days with none fall back to the closest candidate
+        ok = error <= tolerance
+        best = np.where(ok.any(axis=1), ok.argmax(axis=1), error.argmin(axis=1))
+
+        plan = {}
+        for d in range(days):
+            c = best[d]
+            items = [
+                self._item(t, picks[d, c, i], portions[d, c, i]) for i, t in enumerate(self.main_types)
+            ]
+            combo = self.snack_combos[snack[d, c]]
+            for idx in sorted(set(combo)):
+                items.append(self._item('Snack', idx, float(combo.count(idx))))
+            plan[f"Day {d + 1}"] = items
+        return plan
+
+    def _item(self, meal_type, idx, portion):
+        names, cals, units = self.meals[meal_type]
+        return {
+            'name': str(names[idx]), 'type': meal_type, 'unit': str(units[idx]),
+            'cal_per_unit': float(cals[idx]), 'portion': float(portion),
+            'cal': float(cals[idx] * portion)
+        }
@@ -0,0 +1,58 @@
+import threading
+
+# Wrapper for the shared gspread client that routes every method call made
+# through it, and through the spreadsheets/worksheets it hands out, to a hook.
+# metrics.Metrics.trace() and throttle.Throttle.wrap() are both built on it.
+
+
+def is_sheet_object(value):
+    # gspread Spreadsheet/Worksheet (or the fakes); plain data passes through
+    return hasattr(value, 'worksheet') or hasattr(value, 'append_rows')
+
+
+def sheet_key(value):
+    # Worksheets are keyed by tab title, so calls on one tab match across handles
+    return ("ws", value.title) if hasattr(value, 'append_rows') else ("spreadsheet", value.title)
+
+
+class Proxy:
+    # hook(key, method, fn, args, kwargs) makes each call; key is ("client",)
+    # for the client itself and sheet_key() for the objects it returns
+    def __init__(self, target, key, hook):
+        self._target = target
+        self._key = key
+        self._hook = hook
+
+    def _child(self, value):
+        return Proxy(value, sheet_key(value), self._hook)
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if is_sheet_object(value): return self._child(value)
+        if attr.startswith('_') or not callable(value): return value
+        def call(*args, **kwargs):
+            result = self._hook(self._key, attr, value, args, kwargs)
+            if is_sheet_object(result): return self._child(result)
+            if isinstance(result, list) and result and all(is_sheet_object(r) for r in result):
+                return [self._child(r) for r in result]
+            return result
+        return call
+
+    def __repr__(self):
+        return f"<proxy {self._target!r}>"
+
+
+class Proxies:
+    # One proxy per client, so handle caches keyed on id(client) stay valid
+    def __init__(self, hook):
+        self.hook = hook
+        self.lock = threading.Lock()
+        self.wrapped = {}  # id(client) -> (client, proxy)
+
+    def wrap(self, client):
+        if client is None: return None
+        with self.lock:
+            hit = self.wrapped.get(id(client))
+            if hit is None or hit[0] is not client:
+                hit = self.wrapped[id(client)] = (client, Proxy(client, ("client",), self.hook))
+            return hit[1]
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from nutrition import DAILY_COLUMNS, daily_totals
+from sheet_sync import appended_at, col_letter, is_retryable, row_to_entry
+
+# Pre-aggregated `daily` tab: one row per user per day with that day's food
+# and exercise calories, macros and the calorie target in force. Rows are
+# upserted whenever the log for that day is written, so the Analytics page
+# charts a few hundred rows instead of scanning Sheet1.
+
+ROLLUP_HEADER = ['username', 'date'] + DAILY_COLUMNS + ['target']
+
+
+def rollup_row(username, date_str, totals, target=None):
+    return [username, str(date_str)] + [f"{float(totals.get(c, 0)):g}" for c in DAILY_COLUMNS] + [
+        '' if target is None else str(target)
+    ]
+
+
+class DailyRollup:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.header = None
+        self.days = {}  # username -> {date: row values}
+        self.rows = {}  # (username, date) -> sheet row, None until its append is flushed
+        self.n_rows = 0
+        self.checked_at = 0.0
+
+    def _add(self, rows, start):
+        for i, row in enumerate(rows, start=start):
+            row = [str(v) for v in row] + [''] * (len(ROLLUP_HEADER) - len(row))
+            if row[0] and row[1]:
+                # A later row for the same day (e.g. two processes appending) wins
+                self.days.setdefault(row[0], {})[row[1]] = row[:len(ROLLUP_HEADER)]
+                self.rows[(row[0], row[1])] = i
+
+    def _merge(self, username, date_str, row):
+        # A blank target means "not known here": the recorded one is kept
+        old = self.days.get(username, {}).get(date_str)
+        if row[-1] == '' and old: row = row[:-1] + [old[-1]]
+        self.days.setdefault(username, {})[date_str] = row
+
+    def _ensure(self, sheet):
+        if self.header is None:
+            vals = sheet.get_all_values()
+            if not vals or vals[0][:len(ROLLUP_HEADER)] != ROLLUP_HEADER:
+                sheet.update([ROLLUP_HEADER], "A1")
+                vals = [ROLLUP_HEADER] + vals[1:]
+            self.header = ROLLUP_HEADER
+            put = [(u, d, r) for u, days in self.days.items() for d, r in days.items()]  # before the first read
+            self._add(vals[1:], 2)
+            for u, d, r in put: self._merge(u, d, r)
+            self.n_rows = len(vals)
+            self.checked_at = time.monotonic()
+        elif time.monotonic() - self.checked_at >= self.ttl:
+            self._tail(sheet)
+            self.checked_at = time.monotonic()
+
+    def _tail(self, sheet, end=None):
+        # Rows other processes appended since we last looked (up to row `end`)
+        tail = sheet.get(f"A{self.n_rows + 1}:{col_letter(len(ROLLUP_HEADER))}{end or ''}")
+        self._add(tail, self.n_rows + 1)
+        self.n_rows = end or self.n_rows + len(tail)
+
+    def user_frame(self, sheet, username):
+        # -> DataFrame indexed by date with DAILY_COLUMNS + target (NaN when unknown)
+        with self.lock:
+            self._ensure(sheet)
+            rows = list(self.days.get(username, {}).values())
+        cells = pd.to_numeric(pd.Series([v for r in rows for v in r[2:]], dtype=object), errors='coerce')
+        values = cells.to_numpy(dtype=float).reshape(len(rows), len(ROLLUP_HEADER) - 2)
+        df = pd.DataFrame(values, columns=ROLLUP_HEADER[2:], index=pd.to_datetime([r[1] for r in rows])).sort_index()
+        df.index.name = 'date'
+        return df
+
+    def put(self, username, date_str, totals, target=None):
+        # Shown straight away without touching the sheet (so saving never waits
+        # on it); write() reads the tab if needed and sends the row. target
+        # None keeps the day's recorded target.
+        with self.lock:
+            row = rollup_row(username, date_str, totals, target)
+            self._merge(username, row[1], row)
+            self.rows.setdefault((username, row[1]), None)
+
+    def set_targets(self, sheet, date_str, targets):
+        # {username: target} for one day; the day's totals are kept (zeros when new)
+        with self.lock:
+            self._ensure(sheet)
+            for user, target in targets.items():
+                row = self.days.get(user, {}).get(str(date_str)) or rollup_row(user, date_str, {})
+                self.days.setdefault(user, {})[str(date_str)] = row[:-1] + [str(target)]
+                self.rows.setdefault((user, str(date_str)), None)
+
+    def write(self, sheet, keys):
+        # Writes the current rows of the given (username, date) days: known
+        # rows are overwritten in one batch_update, new days go in one append
+        with self.lock:
+            self._ensure(sheet)
+            days = {k: self.days[k[0]][k[1]] for k in keys if k[1] in self.days.get(k[0], {})}
+            known = {k: r for k, r in days.items() if self.rows.get(k)}
+            fresh = [(k, r) for k, r in days.items() if not self.rows.get(k)]
+            last = col_letter(len(ROLLUP_HEADER))
+        if known:
+            sheet.batch_update([
+                {'range': f"A{self.rows[k]}:{last}{self.rows[k]}", 'values': [r]} for k, r in known.items()
+            ])
+        if fresh:
+            try:
+                resp = sheet.append_rows([r for _, r in fresh])
+            except Exception as e:
+                if not is_retryable(e):
+                    with self.lock:
+                        for k, _ in fresh: self.rows.pop(k, None)
+                raise
+            with self.lock:
+                start = appended_at(resp) or self.n_rows + 1
+                if start > self.n_rows + 1:
+                    self._tail(sheet, start - 1)
+                    for k, r in fresh: self.days[k[0]][k[1]] = r  # ours are the newer rows
+                for i, (k, _) in enumerate(fresh): self.rows[k] = start + i
+                self.n_rows = max(self.n_rows, start + len(fresh) - 1)
+
+    def rebuild(self, sheet, log_values):
+        # Recompute every user's rollup from the full Sheet1 contents (header
+        # included) and replace the tab in one write. Targets already in the
+        # tab are kept, with their row even on days that have no entries.
+        with self.lock:
+            self._ensure(sheet)
+            targets = {(u, d): row[-1] for u, days in self.days.items() for d, row in days.items() if row[-1] != ''}
+        by_user = {}
+        for r in log_values[1:]:
+            if r and r[0]:
+                e = row_to_entry(r)
+                by_user.setdefault(e['username'], []).append(e)
+        rows = {}
+        for user, entries in by_user.items():
+            daily = daily_totals(entries)
+            daily = daily[daily.any(axis=1)]
+            for d, row in zip(daily.index, daily.to_dict('records')): rows[(user, str(d.date()))] = rollup_row(user, d.date(), row)
+        for (user, d), target in targets.items(): rows[(user, d)] = (rows.get((user, d)) or rollup_row(user, d, {}))[:-1] + [target]
+        out = [ROLLUP_HEADER] + [rows[k] for k in sorted(rows)]
+        with self.lock:
+            sheet.clear()
+            sheet.update(out, "A1")
+            self.header, self.days, self.rows = None, {}, {}
+            self._ensure(sheet)
+        return len(out) - 1
+
+
+# --- Dashboard maths ---
+
+def window(df, end, days, target):
+    # Last `days` days up to `end`, gaps filled with zeros; unknown targets use
+    # the most recent known one, then the user's current target
+    idx = pd.date_range(pd.Timestamp(end) - pd.Timedelta(days=days - 1), pd.Timestamp(end), freq='D', name='date')
+    out = df.reindex(idx)
+    out[DAILY_COLUMNS] = out[DAILY_COLUMNS].fillna(0.0)
+    known = df['target'].dropna()
+    before = known[known.index < idx[0]]
+    out['target'] = out['target'].ffill().fillna(before.iloc[-1] if len(before) else target)
+    out['net'] = out['food'] - out['exercise']
+    out['balance'] = out['net'] - out['target']
+    return out
+
+
+def streaks(flags):
+    # -> (current run of True ending at the last day, longest run)
+    flags = np.asarray(flags, dtype=bool)
+    if not flags.any(): return 0, 0
+    breaks = np.flatnonzero(~flags)
+    current = len(flags) - (breaks[-1] + 1 if len(breaks) else 0)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], flags.astype(int), [0]])))
+    return int(current), int((edges[1::2] - edges[::2]).max())
+
+
+def weekly(df):
+    # Weekly means of the daily columns, weeks starting on Monday
+    return df[['food', 'exercise', 'net', 'target']].resample('W-MON', label='left', closed='left').mean()
@@ -0,0 +1,426 @@
+import bisect
+import random
+import re
+import threading
+import time
+
+from nutrition import MACROS
+
+# Delta sync between the in-session food log and the Sheet1 log tab.
+# Instead of downloading, clearing and rewriting the whole sheet on every
+# change, we keep a process-wide index of which sheet row holds which
+# (username, date) entry and only send the rows that actually changed.
+
+# Macro and id columns go after username so rows written before they existed still line up
+LOG_HEADER = ['date', 'name', 'cal', 'type', 'amount', 'unit', 'username'] + MACROS + ['entry_id']
+
+_ROW_RANGE = re.compile(r"!?[A-Z]+(\d+)(?::[A-Z]+(\d+))?$")
+
+
+def entry_to_row(entry):
+    return [
+        str(entry['date']),
+        entry['name'],
+        str(entry['cal']),
+        entry['type'],
+        str(entry.get('amount', 1)),
+        str(entry.get('unit', '')),
+        str(entry.get('username') or '')
+    ] + [_grams(entry.get(m)) for m in MACROS] + [str(entry.get('entry_id') or '')]
+
+
+def _grams(value):
+    # Blank rather than 0 so exercise rows and old entries stay unchanged
+    try: g = float(value)
+    except (TypeError, ValueError): return ''
+    return f"{g:g}" if g and g == g else ''
+
+
+def _num(value, default=0):
+    try: return int(value)
+    except (TypeError, ValueError): pass
+    try: return float(value)
+    except (TypeError, ValueError): return default
+
+
+def row_to_entry(row):
+    row = _norm(row)
+    return {
+        'date': row[0], 'name': row[1], 'cal': _num(row[2]), 'type': row[3],
+        'amount': _num(row[4], 1), 'unit': row[5], 'username': row[6],
+        **{m: _num(v) for m, v in zip(MACROS, row[7:])}, 'entry_id': row[-1]
+    }
+
+
+def appended_at(resp):
+    # First row number written by an append_rows() call, if the API told us
+    try:
+        m = _ROW_RANGE.search(resp['updates']['updatedRange'])
+        return int(m.group(1))
+    except (TypeError, KeyError, AttributeError):
+        return None
+
+
+def col_letter(n):
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def _last_col():
+    return col_letter(len(LOG_HEADER))
+
+
+def _norm(row):
+    row = [str(v) for v in row[:len(LOG_HEADER)]]
+    return row + [''] * (len(LOG_HEADER) - len(row))
+
+
+def _content(entry):
+    return (str(entry['date']), entry['name'], entry['type'], str(entry.get('unit', '')),
+            _num(entry['cal']), _num(entry.get('amount', 1), 1))
+
+
+def _runs(row_numbers):
+    # [3, 4, 5, 9] -> [(3, 5), (9, 9)] so contiguous rows are fetched as one range
+    out = []
+    for r in sorted(row_numbers):
+        if out and r == out[-1][1] + 1: out[-1][1] = r
+        else: out.append([r, r])
+    return out
+
+
+class LogSync:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # username -> date -> list of [row_number, values or None until fetched]
+        self.index = None
+        self.ids = {}  # (username, entry_id) -> the same slot, to find entries whose date changed
+        self.n_rows = 0
+
+    def _slots(self, username, date_str):
+        return self.index.setdefault(username, {}).setdefault(date_str, [])
+
+    def _add_slot(self, username, date_str, slot, entry_id):
+        self._slots(username, date_str).append(slot)
+        if entry_id: self.ids[(username, entry_id)] = slot
+
+    def _seed(self, sheet):
+        # Only the key columns are read; row contents are fetched on demand
+        header = sheet.row_values(1)
+        self.index = {}
+        if not header:
+            sheet.append_row(LOG_HEADER)
+            self.n_rows = 1
+            return
+        if header[:len(LOG_HEADER)] != LOG_HEADER:
+            sheet.update([LOG_HEADER], "A1")
+        user_col, id_col = col_letter(LOG_HEADER.index('username') + 1), _last_col()
+        dates, users, ids = sheet.batch_get(["A2:A", f"{user_col}2:{user_col}", f"{id_col}2:{id_col}"])
+        self.n_rows = 1 + len(dates)
+        cell = lambda col, i: col[i][0] if i < len(col) and col[i] else ''
+        for i, date_cell in enumerate(dates):
+            if date_cell and date_cell[0]: self._add_slot(cell(users, i), date_cell[0], [i + 2, None], cell(ids, i))
+
+    def _refresh_tail(self, sheet, end=None):
+        # Pick up rows appended by other processes since we last looked (up to row `end`)
+        rows = sheet.get(f"A{self.n_rows + 1}:{_last_col()}{end or ''}")
+        for i, row in enumerate(rows, start=self.n_rows + 1):
+            row = _norm(row)
+            if row[0]: self._add_slot(row[6], row[0], [i, row], row[-1])
+        self.n_rows = end or self.n_rows + len(rows)
+
+    def _read_rows(self, sheet, row_numbers):
+        # -> {row_number: values}, contiguous rows fetched as one range
+        if not row_numbers: return {}
+        runs = _runs(row_numbers)
+        blocks = sheet.batch_get([f"A{a}:{_last_col()}{b}" for a, b in runs])
+        return {r: _norm(block[r - a] if r - a < len(block) else []) for (a, b), block in zip(runs, blocks) for r in range(a, b + 1)}
+
+    def _fetch(self, sheet, slots):
+        missing = {s[0]: s for s in slots if s[1] is None}
+        for r, values in self._read_rows(sheet, missing).items(): missing[r][1] = values
+
+    def _open(self, sheet):
+        if self.index is None: self._seed(sheet)
+        else: self._refresh_tail(sheet)
+
+    def read(self, sheet, username, start, end, cache=True):
+        # -> {date: [row values]} for one user between two ISO dates (inclusive).
+        # With cache=False rows not already cached are read without keeping them
+        # (one-off scans such as an export).
+        with self.lock:
+            self._open(sheet)
+            days = {d: slots for d, slots in self.index.get(username, {}).items() if start <= d <= end}
+            if cache:
+                self._fetch(sheet, [s for slots in days.values() for s in slots])
+                return {d: [list(s[1]) for s in slots] for d, slots in sorted(days.items())}
+            read = self._read_rows(sheet, [s[0] for slots in days.values() for s in slots if s[1] is None])
+            return {d: [list(s[1] or read[s[0]]) for s in slots] for d, slots in sorted(days.items())}
+
+    def day_counts(self, sheet, username):
+        # -> [(date, rows)] of one user, oldest first, from the index alone
+        with self.lock:
+            self._open(sheet)
+            return [(d, len(slots)) for d, slots in sorted(self.index.get(username, {}).items())]
+
+    def _append(self, sheet, rows):
+        resp = sheet.append_rows(rows)
+        start = appended_at(resp) or self.n_rows + 1
+        # Rows other processes appended since our last look landed before ours
+        if start > self.n_rows + 1: self._refresh_tail(sheet, start - 1)
+        for i, row in enumerate(rows): self._add_slot(row[6], row[0], [start + i, row], row[-1])
+        self.n_rows = max(self.n_rows, start + len(rows) - 1)
+
+    def _find(self, slots, entry_id, before, used):
+        # The row holding an entry: by id, or for rows written before ids
+        # existed, a blank-id row with the entry's old content
+        # (numbers compared as numbers: the sheet may hold "80" for 80.0)
+        old = _content(before) if before else None
+        for s in slots:
+            if id(s) in used: continue
+            if s[1][-1] == entry_id or (old and not s[1][-1] and _content(row_to_entry(s[1])) == old):
+                used.add(id(s))
+                return s
+        return None
+
+    def _by_id(self, username, entry_id, used):
+        # The entry's row on another day, e.g. re-imported with a changed date
+        slot = self.ids.get((username, entry_id))
+        if slot is None or id(slot) in used: return None
+        used.add(id(slot))
+        return slot
+
+    def apply(self, sheet, changes):
+        # changes: {(username, entry_id): (before, after)}, before None for new
+        # entries and after None for deletions. Only those rows are written:
+        # one batch_update for edits, one delete and one append_rows.
+        # -> [(username, date)] of days an edited row moved away from
+        with self.lock:
+            if self.index is None: self._seed(sheet)
+            days = {(u, str((b or a)['date'])) for (u, _), (b, a) in changes.items()}
+            self._fetch(sheet, [s for u, d in days for s in self.index.get(u, {}).get(d, [])])
+            edits, stale, fresh, used, moved = [], [], [], set(), []
+            for (user, entry_id), (before, after) in changes.items():
+                slot = self._find(self.index.get(user, {}).get(str((before or after)['date']), []), entry_id, before, used)
+                if slot is None: slot = self._by_id(user, entry_id, used)
+                row = _norm(entry_to_row({**after, 'username': user, 'entry_id': entry_id})) if after else None
+                if row is None:
+                    if slot: stale.append(slot[0])
+                elif slot is None: fresh.append(row)
+                elif slot[1] != row: edits.append((user, slot, row))
+            if edits:
+                sheet.batch_update([{'range': f"A{slot[0]}:{_last_col()}{slot[0]}", 'values': [row]} for _, slot, row in edits])
+                for user, slot, row in edits:
+                    slot[1] = row
+                    self.ids[(user, row[-1])] = slot
+                    old = self._move(user, slot, row[0])
+                    if old: moved.append((user, old))
+            if stale: self._delete(sheet, stale)
+            if fresh: self._append(sheet, fresh)
+            return moved
+
+    def _move(self, username, slot, date_str):
+        # Keeps an edited row under its (possibly new) date -> the date it left, if any
+        days, old = self.index.setdefault(username, {}), None
+        for d, slots in list(days.items()):
+            if any(s is slot for s in slots):
+                if d == date_str: return None
+                slots[:] = [s for s in slots if s is not slot]
+                if not slots: del days[d]
+                old = d
+                break
+        bisect.insort(self._slots(username, date_str), slot)
+        return old
+
+    def _delete(self, sheet, row_numbers):
+        gone = sorted(row_numbers)
+        sheet.spreadsheet.batch_update({'requests': [
+            {'deleteDimension': {'range': {
+                'sheetId': sheet.id, 'dimension': 'ROWS', 'startIndex': r - 1, 'endIndex': r
+            }}}
+            for r in reversed(gone)
+        ]})
+        # Everything below a deleted row moves up
+        dead = set(gone)
+        self.ids = {k: s for k, s in self.ids.items() if s[0] not in dead}
+        for user_days in self.index.values():
+            for date_str, slots in list(user_days.items()):
+                slots[:] = [s for s in slots if s[0] not in dead]
+                for s in slots: s[0] -= bisect.bisect_left(gone, s[0])
+                if not slots: del user_days[date_str]
+        self.n_rows -= len(gone)
+
+
+# --- Write-behind queue ---
+# Button handlers hand their writes to this queue and return immediately; a
+# daemon thread flushes them on a timer (or once enough piled up), merging
+# everything queued under the same key into one call.
+
+RETRY_CODES = (429, 500, 502, 503)
+# A 5xx can arrive after the server applied the request, and resending these
+# would then apply them twice (rows shift); only a 429 is safe for them
+NOT_IDEMPOTENT = {'append_row', 'append_rows', 'delete_rows', 'insert_rows', 'spreadsheet.batch_update'}
+
+
+class NotReady(Exception):
+    # A job whose rows depend on a write still queued; retried like a 429
+    code = 429
+
+
+def is_retryable(err):
+    # The throttle records the failed call on the error as `op`
+    code = getattr(err, 'code', None)
+    return code == 429 or (code in RETRY_CODES and getattr(err, 'op', None) not in NOT_IDEMPOTENT)
+
+
+def merge_latest(old, new):
+    return {**old, **new}
+
+
+def merge_changes(old, new):
+    # Per-entry (before, after) pairs: keep the oldest before and the newest after
+    out = dict(old)
+    for key, (before, after) in new.items():
+        if key in out: before = out[key][0]
+        if before is None and after is None: out.pop(key, None)  # added then deleted
+        else: out[key] = (before, after)
+    return out
+
+
+def merge_append(old, new):
+    return old + new
+
+
+class _Job:
+    def __init__(self, fn, payload, merge):
+        self.fn = fn
+        self.payload = payload
+        self.merge = merge
+        self.owners = {}
+        self.attempts = 0
+        self.not_before = 0.0
+
+
+class WriteBehind:
+    def __init__(self, interval=2.0, max_pending=20, max_attempts=6, backoff=1.0):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.cond = threading.Condition()
+        self.jobs = {}
+        self.inflight = {}
+        self.submitted = 0
+        self.kicked = False  # flush now instead of at the next interval
+        self.flushing = False
+        self.running = None  # (thread, key) of the job being flushed
+        self.spawned = {}    # key -> key of the job that queued it, for drain()
+        self.thread = None
+
+    def submit(self, owner, key, fn, payload, merge=merge_latest):
+        with self.cond:
+            job = self.jobs.get(key)
+            if job:
+                job.fn = fn
+                job.payload = job.merge(job.payload, payload)
+            else:
+                job = self.jobs[key] = _Job(fn, payload, merge)
+            job.owners[owner] = job.owners.get(owner, 0) + 1
+            if self.running and self.running[0] is threading.current_thread(): self.spawned[key] = self.running[1]
+            self.submitted += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self.thread.start()
+            if self.submitted >= self.max_pending: self.cond.notify_all()
+
+    def pending_for(self, owner):
+        with self.cond:
+            jobs = list(self.jobs.values()) + list(self.inflight.values())
+            return sum(job.owners.get(owner, 0) for job in jobs)
+
+    def pending_total(self):
+        with self.cond:
+            jobs = list(self.jobs.values()) + list(self.inflight.values())
+            return sum(sum(job.owners.values()) for job in jobs)
+
+    def pending_payloads(self, key):
+        with self.cond:
+            return [j.payload for j in (self.inflight.get(key), self.jobs.get(key)) if j]
+
+    def kick(self):
+        with self.cond:
+            self.kicked = True
+            self.cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.kicked or self.submitted >= self.max_pending, timeout=self.interval)
+                self.kicked = False
+            self.flush()
+
+    def flush(self):
+        now = time.monotonic()
+        with self.cond:
+            if self.flushing: return
+            self.flushing = True
+            due = {k: j for k, j in self.jobs.items() if j.not_before <= now}
+            for k in due: del self.jobs[k]
+            self.inflight = dict(due)
+            self.submitted = 0
+        try:
+            for key, job in due.items():
+                self.running = (threading.current_thread(), key)
+                try:
+                    job.fn(job.payload)
+                except Exception as e:
+                    job.attempts += 1
+                    if not is_retryable(e) or job.attempts >= self.max_attempts:
+                        print(f"Sync Error ({key}): {e}")
+                        continue
+                    delay = self.backoff * (2 ** (job.attempts - 1))
+                    job.not_before = time.monotonic() + delay + random.uniform(0, delay / 2)
+                    self._requeue(key, job)
+                finally:
+                    with self.cond:
+                        self.inflight.pop(key, None)
+                        self.running = None
+        finally:
+            with self.cond:
+                self.flushing = False
+                self.cond.notify_all()
+
+    def drain(self):
+        # Writes everything queued so far, and what those jobs queue in turn,
+        # before returning. Unlike flush() it waits for a flush already running
+        # and for jobs backing off after an error (until they succeed or run
+        # out of attempts).
+        if self.running and self.running[0] is threading.current_thread(): raise RuntimeError("drain() called from a write-behind job")
+        with self.cond:
+            keys = set(self.jobs) | set(self.inflight)
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: not self.flushing)
+                keys |= {k for k, parent in self.spawned.items() if parent in keys}
+                left = [j for k, j in self.jobs.items() if k in keys]
+                if not left: return
+                delay = min(j.not_before for j in left) - time.monotonic()
+            if delay > 0: time.sleep(delay)
+            self.flush()
+
+    def _requeue(self, key, job):
+        # Anything queued meanwhile is newer than the failed payload
+        with self.cond:
+            newer = self.jobs.get(key)
+            if newer:
+                newer.payload = job.merge(job.payload, newer.payload)
+                for o, n in job.owners.items(): newer.owners[o] = newer.owners.get(o, 0) + n
+                newer.attempts, newer.not_before = job.attempts, job.not_before
+            else:
+                self.jobs[key] = job
@@ -0,0 +1,538 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from accounts import PROFILE_HEADER, USER_HEADER, numericise
+from nutrition import DAILY_COLUMNS, MACROS, daily_totals, day_totals
+from rollups import ROLLUP_HEADER
+from log_store import new_entry_id
+from sheet_sync import LOG_HEADER, RETRY_CODES, NotReady, is_retryable, merge_append, merge_changes, row_to_entry
+
+# Storage backends behind one repository interface used by app.py:
+#   get_user(username)          add_user(row)            pending_users()
+#   approve_users(usernames)    latest_profile(username) profile_history(username)
+#   add_profile(row)            read_log(username, start, end) -> [entries]
+#   daily_frame(username)       rebuild_daily()          import_profiles(rows)
+#   import_log(username, entries)
+#   export_log(username) -> iterator of entries, oldest first
+#   save_entries(username, changes, totals, target) -- only the changed rows
+#   latest_profiles() -> every user's latest profile    profiles_version()
+#   save_targets(date, {username: target}) -- one batched write
+# Log entries carry a stable `entry_id` (log_store.new_entry_id()).
+# Rows passed to add_user/add_profile follow USER_HEADER/PROFILE_HEADER.
+# SQLiteRepository is the primary store; SheetsRepository goes to the
+# spreadsheet through the write-behind queue and is either the export/import
+# target of a MirroredRepository or, with NUTRITRACK_STORAGE=sheets, the
+# only store.
+
+
+class SheetsRepository:
+    def __init__(self, tab, queue, directory, profiles, log_sync, rollups):
+        # tab(name, create_cols=None) -> worksheet or None; the rest are the
+        # process-wide views/queue shared by every session
+        self.tab = tab
+        self.queue = queue
+        self.directory = directory
+        self.profiles = profiles
+        self.log_sync = log_sync
+        self.rollups = rollups
+
+    def _sheet(self, name, create_cols=None):
+        sheet = self.tab(name, create_cols)
+        if not sheet: raise RuntimeError(f"Worksheet '{name}' is not available")
+        return sheet
+
+    # --- users ---
+    def get_user(self, username):
+        return self.directory.lookup(self._sheet("users"), username)
+
+    def add_user(self, row):
+        sheet = self._sheet("users")
+        self.directory.add_pending(row)
+        self.queue.submit(row[0], "users", lambda rows: self.directory.append(sheet, rows), [row], merge_append)
+
+    def pending_users(self):
+        sheet = self.tab("users")
+        return self.directory.pending(sheet) if sheet else []
+
+    def approve_users(self, usernames, wait=True):
+        sheet = self._sheet("users")
+        if not wait:
+            self.queue.submit(None, "approve", lambda names: self._approve(sheet, names), list(usernames), merge_append)
+            return list(usernames)
+        self.queue.drain() # Queued registrations need a sheet row before they can be approved
+        return self.directory.approve(sheet, usernames)
+
+    def _approve(self, sheet, names):
+        # Approved names leave the payload; the rest wait for their registration to land
+        done = set(self.directory.approve(sheet, names))
+        names[:] = [n for n in names if n not in done]
+        if names: raise NotReady(f"no sheet row yet for {', '.join(names)}")
+
+    # --- profiles ---
+    def latest_profile(self, username):
+        return self.profiles.latest(self._sheet("profiles"), username)
+
+    def profile_history(self, username):
+        return self.profiles.user_history(self._sheet("profiles"), username)
+
+    def latest_profiles(self):
+        return self.profiles.latest_all(self._sheet("profiles"))[1]
+
+    def profiles_version(self):
+        return self.profiles.current_version(self._sheet("profiles"))
+
+    def add_profile(self, row):
+        sheet = self._sheet("profiles")
+        self.profiles.add_pending(sheet, row)
+        self.queue.submit(row[0], "profiles", lambda rows: self.profiles.append(sheet, rows), [row], merge_append)
+
+    # --- food/exercise log ---
+    def read_log(self, username, start, end):
+        days = {
+            d: [row_to_entry(r) for r in rows]
+            for d, rows in self.log_sync.read(self._sheet("Sheet1"), username, start, end).items()
+        }
+        # Writes still waiting in the queue are newer than what the sheet has
+        for pending in self.queue.pending_payloads("Sheet1 rows"):
+            for (user, entry_id), (before, after) in pending.items():
+                d = str((before or after)['date'])
+                if user != username or not start <= d <= end: continue
+                day = days.setdefault(d, [])
+                old = next((i for i, e in enumerate(day) if e.get('entry_id') == entry_id), None)
+                if old is None and before: old = next((i for i, e in enumerate(day) if not e.get('entry_id') and e['name'] == before['name'] and e['cal'] == before['cal']), None)
+                if old is not None: del day[old]
+                if after: day.insert(len(day) if old is None else old, {**after, 'entry_id': entry_id})
+        return [e for d in sorted(days) for e in days[d]]
+
+    def save_entries(self, username, changes, totals, target=None):
+        # changes: [(before, after)] by entry_id (before None = new, after None =
+        # deleted); totals: {date: day totals after the change} for the rollups.
+        # Queued edits of the same entry merge, and only those rows are written.
+        for d, t in totals.items(): self.rollups.put(username, d, t, target)
+        payload = {(username, (after or before)['entry_id']): (dict(before) if before else None, dict(after) if after else None) for before, after in changes}
+        self.queue.submit(username, "Sheet1 rows", self._sync_rows, payload, merge_changes)
+
+    def _sync_rows(self, changes):
+        keys = sorted({(u, str((b or a)['date'])) for (u, _), (b, a) in changes.items()})
+        self._write_log(lambda sheet: self.log_sync.apply(sheet, changes), keys)
+
+    def _write_log(self, write, days):
+        sheet = self._sheet("Sheet1")
+        try:
+            write(sheet)
+        except Exception as e:
+            # Quota errors are retried by the write queue and leave the index intact;
+            # anything else may have left row positions stale, so re-read them
+            if is_retryable(e): raise
+            self.log_sync.reset()
+            if getattr(e, 'code', None) in RETRY_CODES:
+                # A 5xx append/delete may have landed. After the re-read LogSync finds
+                # rows by entry_id and day content, so sending the write again is safe.
+                e.op = None
+                raise
+            print(f"Sync Error: {e}")
+            return
+        # Days just written get their `daily` rollup rows rewritten too
+        daily_sheet = self.tab("daily", len(ROLLUP_HEADER))
+        if daily_sheet:
+            try: self.rollups.write(daily_sheet, list(days))
+            except Exception as e:
+                if is_retryable(e): raise
+                print(f"Rollup Error: {e}")
+
+    def save_targets(self, date_str, targets):
+        # All users' rows for the day go out in one batch_update plus one append_rows
+        daily_sheet = self._sheet("daily", len(ROLLUP_HEADER))
+        self.rollups.set_targets(daily_sheet, date_str, targets)
+        keys = [(user, str(date_str)) for user in targets]
+        self.queue.submit(None, "targets", lambda ks: self.rollups.write(daily_sheet, ks), keys, merge_append)
+        return len(keys)
+
+    def import_log(self, username, entries, wait=True):
+        # New rows go out in one append_rows per flush; with wait the chunk is
+        # written before returning, so a long import never piles up in the queue
+        rows = [{**e, 'username': username, 'entry_id': e.get('entry_id') or new_entry_id()} for e in entries]
+        self.queue.submit(username, "import", self._import_log, rows, merge_append)
+        if wait: self.queue.drain()
+
+    def _import_log(self, entries):
+        # Upserted by entry_id: rows already in the sheet are overwritten (on
+        # whatever day they are), so re-importing an export doesn't double the log
+        changes = {(e['username'], e['entry_id']): (e, e) for e in entries}
+        keys = sorted({(e['username'], str(e['date'])) for e in entries})
+        self._write_log(lambda sheet: self._import_rows(sheet, changes, keys), keys)
+
+    def _import_rows(self, sheet, changes, keys):
+        # keys gains the days rows moved away from, so their rollups are redone too
+        keys[:] = sorted(set(keys) | set(self.log_sync.apply(sheet, changes)))
+        daily_sheet = self.tab("daily", len(ROLLUP_HEADER))
+        if not daily_sheet: return
+        # Days that gained or lost rows get their rollups recomputed from the whole day
+        for user in {u for u, _ in keys}:
+            dates = [d for u, d in keys if u == user]
+            days = self.log_sync.read(sheet, user, dates[0], dates[-1])
+            daily = daily_totals([row_to_entry(r) for d in dates for r in days.get(d, [])])
+            for d in dates: self.rollups.put(user, d, day_totals(daily, d))
+
+    def import_profiles(self, rows):
+        for row in rows: self.add_profile(row)
+
+    def export_log(self, username, page=1000):
+        # Whole days at a time, about `page` rows per read, without filling the
+        # shared row cache; queued writes land first
+        sheet = self._sheet("Sheet1")
+        self.queue.drain()
+        pages, n = [], page
+        for d, rows in self.log_sync.day_counts(sheet, username):
+            if n >= page: pages, n = pages + [[d, d]], 0
+            pages[-1][1] = d
+            n += rows
+        for first, last in pages:
+            for rows in self.log_sync.read(sheet, username, first, last, cache=False).values():
+                for r in rows: yield row_to_entry(r)
+
+    def daily_frame(self, username):
+        return self.rollups.user_frame(self._sheet("daily", len(ROLLUP_HEADER)), username)
+
+    def rebuild_daily(self):
+        # One full read of Sheet1, one write of the `daily` tab
+        sheet, daily_sheet = self._sheet("Sheet1"), self._sheet("daily", len(ROLLUP_HEADER))
+        self.queue.drain()
+        return self.rollups.rebuild(daily_sheet, sheet.get_all_values())
+
+    def dump(self):
+        # -> {tab: all values} for SQLiteRepository.load_dump()
+        self.queue.drain()
+        out = {}
+        for name in ("users", "profiles", "Sheet1", "daily"):
+            sheet = self.tab(name)
+            out[name] = sheet.get_all_values() if sheet else []
+        return out
+
+
+# --- SQLite ---
+# One connection per process in WAL mode (readers never block the writer and
+# several server processes can share the file). Calls are serialised by a
+# lock; each is a single indexed query, well under a millisecond.
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, name TEXT, date TEXT, status TEXT);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY, username TEXT NOT NULL, date TEXT, weight, height, age, gender TEXT, activity TEXT, goal TEXT
+);
+CREATE INDEX IF NOT EXISTS profiles_username ON profiles (username, id);
+CREATE INDEX IF NOT EXISTS profiles_latest ON profiles (username, date, id);
+CREATE TABLE IF NOT EXISTS log (
+    id INTEGER PRIMARY KEY, username TEXT NOT NULL, date TEXT NOT NULL, name TEXT, cal REAL, type TEXT,
+    amount REAL, unit TEXT, {", ".join(f"{m} REAL" for m in MACROS)}, entry_id TEXT
+);
+CREATE INDEX IF NOT EXISTS log_username_date ON log (username, date);
+CREATE TABLE IF NOT EXISTS daily (
+    username TEXT NOT NULL, date TEXT NOT NULL, {", ".join(f"{c} REAL" for c in DAILY_COLUMNS)}, target REAL,
+    PRIMARY KEY (username, date)
+);
+"""
+
+
+def _num(v, default=0.0):
+    try: return float(v) if v == v else default
+    except (TypeError, ValueError): return default
+
+
+def _log_values(e):
+    # An entry as a log row, ordered like LOG_HEADER; entries without an id get one
+    return [
+        str(e['date']), str(e.get('name', '')), _num(e.get('cal')), str(e.get('type', '')), _num(e.get('amount'), 1.0),
+        str(e.get('unit', '')), str(e.get('username') or '')
+    ] + [_num(e.get(m)) for m in MACROS] + [str(e.get('entry_id') or new_entry_id())]
+
+
+def _records(values, header):
+    # Sheet values (header row first) -> list of rows ordered like `header`
+    if not values: return []
+    cols = [values[0].index(h) if h in values[0] else None for h in header]
+    return [[row[i] if i is not None and i < len(row) else '' for i in cols] for row in values[1:] if any(row)]
+
+
+class SQLiteRepository:
+    def __init__(self, path):
+        if path != ':memory:': os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        self.imported = False
+        self.reloads = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA busy_timeout=5000")
+        self.db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Databases created before entries had ids get the column and fresh ids
+        with self.lock, self.db:
+            if 'entry_id' not in [r[1] for r in self.db.execute("PRAGMA table_info(log)")]:
+                self.db.execute("ALTER TABLE log ADD COLUMN entry_id TEXT")
+            self.db.execute("UPDATE log SET entry_id = lower(hex(randomblob(6))) WHERE coalesce(entry_id, '') = ''")
+            self.db.execute("CREATE INDEX IF NOT EXISTS log_entry_id ON log (username, entry_id)")
+
+    def _all(self, sql, params=()):
+        with self.lock:
+            return [dict(r) for r in self.db.execute(sql, params).fetchall()]
+
+    # --- users ---
+    def get_user(self, username):
+        rows = self._all("SELECT * FROM users WHERE username = ?", (username,))
+        return rows[0] if rows else None
+
+    def add_user(self, row):
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO users VALUES (?, ?, ?, ?, ?)", [str(v) for v in row[:len(USER_HEADER)]])
+
+    def pending_users(self):
+        return self._all("SELECT * FROM users WHERE lower(trim(coalesce(status, ''))) != 'approved' ORDER BY rowid")
+
+    def approve_users(self, usernames):
+        with self.lock, self.db:
+            marks = ", ".join("?" * len(usernames))
+            todo = [r[0] for r in self.db.execute(f"SELECT username FROM users WHERE username IN ({marks})", list(usernames))]
+            self.db.execute(f"UPDATE users SET status = 'approved' WHERE username IN ({marks})", list(usernames))
+        return todo
+
+    # --- profiles ---
+    def latest_profile(self, username):
+        # By date, not insertion order: imported rows may be older than the current profile
+        rows = self._all(f"SELECT {', '.join(PROFILE_HEADER)} FROM profiles WHERE username = ? ORDER BY date DESC, id DESC LIMIT 1", (username,))
+        return rows[0] if rows else None
+
+    def profile_history(self, username):
+        return self._all(f"SELECT {', '.join(PROFILE_HEADER)} FROM profiles WHERE username = ? ORDER BY date, id", (username,))
+
+    def latest_profiles(self):
+        # Each user's first row in profiles_latest order, read off the index
+        return self._all(
+            f"SELECT {', '.join(PROFILE_HEADER)} FROM profiles p WHERE id = "
+            "(SELECT id FROM profiles WHERE username = p.username ORDER BY date DESC, id DESC LIMIT 1)"
+        )
+
+    def profiles_version(self):
+        # Profiles are append-only, so the last id changes with every save; reloads renumber them
+        with self.lock:
+            return self.reloads, self.db.execute("SELECT COALESCE(MAX(id), 0) FROM profiles").fetchone()[0]
+
+    def add_profile(self, row):
+        with self.lock, self.db:
+            self._insert_profiles([row])
+
+    def _insert_profiles(self, rows):
+        self.db.executemany(
+            f"INSERT INTO profiles ({', '.join(PROFILE_HEADER)}) VALUES ({', '.join('?' * len(PROFILE_HEADER))})",
+            [[numericise(str(v)) if str(v) != '' else '' for v in row[:len(PROFILE_HEADER)]] for row in rows]
+        )
+
+    # --- food/exercise log ---
+    def read_log(self, username, start, end):
+        return self._all(
+            f"SELECT {', '.join(LOG_HEADER)} FROM log WHERE username = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (username, start, end)
+        )
+
+    def _insert_log(self, entries):
+        self.db.executemany(
+            f"INSERT INTO log ({', '.join(LOG_HEADER)}) VALUES ({', '.join('?' * len(LOG_HEADER))})",
+            [_log_values(e) for e in entries]
+        )
+
+    def save_entries(self, username, changes, totals=None, target=None):
+        # Only the changed rows are touched; the daily rows of their days are
+        # recomputed in SQL, so `totals` is not needed here
+        dates = set()
+        with self.lock, self.db:
+            for before, after in changes:
+                entry = {**(after or before), 'username': username}
+                dates.add(str(entry['date']))
+                if after is None:
+                    self.db.execute("DELETE FROM log WHERE username = ? AND entry_id = ?", (username, entry['entry_id']))
+                    continue
+                values = _log_values(entry)
+                cur = self.db.execute(
+                    f"UPDATE log SET {', '.join(f'{c} = ?' for c in LOG_HEADER)} WHERE username = ? AND entry_id = ?",
+                    values + [username, entry['entry_id']]
+                )
+                if not cur.rowcount: self._insert_log([entry])
+            self._refresh_days(username, dates, target)
+
+    def _refresh_days(self, username, dates, target=None):
+        days = (username, json.dumps(sorted(dates)))
+        self._refresh_daily("WHERE l.username = ? AND l.date IN (SELECT value FROM json_each(?))", days)
+        self.db.execute(
+            "DELETE FROM daily WHERE username = ? AND date IN (SELECT value FROM json_each(?)) "
+            "AND NOT EXISTS (SELECT 1 FROM log l WHERE l.username = daily.username AND l.date = daily.date)", days
+        )
+        if target is not None: self.db.execute("UPDATE daily SET target = ? WHERE username = ? AND date IN (SELECT value FROM json_each(?))", (target,) + days)
+
+    def save_targets(self, date_str, targets):
+        # One transaction; days without a row yet get an empty one holding the target
+        with self.lock, self.db:
+            self.db.executemany(
+                f"INSERT INTO daily (username, date, {', '.join(DAILY_COLUMNS)}, target) VALUES (?, ?, {', '.join('0' * len(DAILY_COLUMNS))}, ?) "
+                "ON CONFLICT (username, date) DO UPDATE SET target = excluded.target",
+                [(user, str(date_str), float(t)) for user, t in targets.items()]
+            )
+        return len(targets)
+
+    def import_log(self, username, entries):
+        # Entries whose entry_id is already logged overwrite that row, so
+        # re-importing an export leaves the log as it was
+        entries = list({e['entry_id']: e for e in (
+            {**e, 'username': username, 'entry_id': e.get('entry_id') or new_entry_id()} for e in entries
+        )}.values())
+        with self.lock, self.db:
+            known = dict(self.db.execute(
+                "SELECT entry_id, date FROM log WHERE username = ? AND entry_id IN (SELECT value FROM json_each(?))",
+                (username, json.dumps([e['entry_id'] for e in entries]))
+            ).fetchall())
+            self.db.executemany(
+                f"UPDATE log SET {', '.join(f'{c} = ?' for c in LOG_HEADER)} WHERE username = ? AND entry_id = ?",
+                [_log_values(e) + [username, e['entry_id']] for e in entries if e['entry_id'] in known]
+            )
+            self._insert_log([e for e in entries if e['entry_id'] not in known])
+            self._refresh_days(username, {str(e['date']) for e in entries} | set(known.values()))
+
+    def import_profiles(self, rows):
+        with self.lock, self.db:
+            self._insert_profiles(rows)
+
+    def export_log(self, username, page=1000):
+        # Keyset pages, so the lock is never held while the caller consumes rows
+        last = ("", 0)
+        while True:
+            rows = self._all(
+                f"SELECT id, {', '.join(LOG_HEADER)} FROM log WHERE username = ? AND (date > ? OR (date = ? AND id > ?)) "
+                "ORDER BY date, id LIMIT ?", (username, last[0], last[0], last[1], page)
+            )
+            for r in rows: yield {k: r[k] for k in LOG_HEADER}
+            if len(rows) < page: return
+            last = (rows[-1]['date'], rows[-1]['id'])
+
+    def daily_frame(self, username):
+        with self.lock:
+            df = pd.read_sql_query(
+                f"SELECT date, {', '.join(ROLLUP_HEADER[2:])} FROM daily WHERE username = ? ORDER BY date",
+                self.db, params=(username,), index_col='date'
+            )
+        df.index = pd.to_datetime(df.index)
+        return df.astype(float)
+
+    def rebuild_daily(self):
+        # Recomputed from the log in SQL; targets already recorded are kept,
+        # with their row even on days that have no entries
+        with self.lock, self.db:
+            self._refresh_daily()
+            empty = "NOT EXISTS (SELECT 1 FROM log l WHERE l.username = daily.username AND l.date = daily.date)"
+            self.db.execute(f"DELETE FROM daily WHERE target IS NULL AND {empty}")
+            self.db.execute(f"UPDATE daily SET {', '.join(f'{c} = 0' for c in DAILY_COLUMNS)} WHERE {empty}")
+            return self.db.execute("SELECT COUNT(*) FROM daily").fetchone()[0]
+
+    def _refresh_daily(self, where="", params=()):
+        # Upserts the daily rows of every (username, date) in the log matching `where`
+        sums = ["SUM(CASE WHEN l.type = 'Manual' THEN l.cal ELSE 0 END)", "SUM(CASE WHEN l.type = 'Exercise' THEN l.cal ELSE 0 END)"]
+        sums += [f"SUM(CASE WHEN l.type = 'Manual' THEN coalesce(l.{m}, 0) ELSE 0 END)" for m in MACROS]
+        self.db.execute(
+            f"INSERT OR REPLACE INTO daily SELECT l.username, l.date, {', '.join(sums)}, "
+            "(SELECT d.target FROM daily d WHERE d.username = l.username AND d.date = l.date) "
+            f"FROM log l {where} GROUP BY l.username, l.date", params
+        )
+
+    # --- import from Sheets ---
+    def is_empty(self):
+        with self.lock:
+            return not any(self.db.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone() for t in ("users", "profiles", "log"))
+
+    def load_dump(self, dump):
+        # Replaces every table with the contents of SheetsRepository.dump()
+        with self.lock, self.db:
+            for t in ("users", "profiles", "log", "daily"): self.db.execute(f"DELETE FROM {t}")
+            self.reloads += 1
+            self.db.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)", _records(dump.get("users"), USER_HEADER))
+            self._insert_profiles(_records(dump.get("profiles"), PROFILE_HEADER))
+            self._insert_log([row_to_entry(r) for r in _records(dump.get("Sheet1"), LOG_HEADER) if r[0]])
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO daily VALUES ({', '.join('?' * len(ROLLUP_HEADER))})",
+                [[v if v != '' else None for v in r] for r in _records(dump.get("daily"), ROLLUP_HEADER) if r[0] and r[1]]
+            )
+        return self.rebuild_daily()
+
+    def import_once(self, remote):
+        # First start on an empty database pulls everything from Sheets
+        with self.lock:
+            if self.imported: return
+            if self.is_empty(): self.load_dump(remote.dump())
+            self.imported = True
+
+
+class MirroredRepository:
+    # Reads and writes go to the local store. Writes are also exported to
+    # Sheets by the write-behind thread, which makes the whole remote call
+    # (including the tab reads it may need), so a local write never waits on
+    # Sheets and a failure there never fails it
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+
+    def __getattr__(self, name):
+        return getattr(self.local, name)
+
+    def _export(self, owner, method, *args):
+        self.remote.queue.submit(owner, "export", self._send, [(method, args)], merge_append)
+
+    def _send(self, calls):
+        # In order; each call leaves the payload once made, so a retry resumes at the one that failed
+        while calls:
+            method, args = calls[0]
+            try: getattr(self.remote, method)(*args)
+            except Exception as e:
+                if is_retryable(e): raise
+                print(f"Export Error ({method}): {e}")
+            calls.pop(0)
+
+    def add_user(self, row):
+        self.local.add_user(row)
+        self._export(row[0], "add_user", row)
+
+    def approve_users(self, usernames):
+        done = self.local.approve_users(usernames)
+        if done: self._export(None, "approve_users", done, False)
+        return done
+
+    def add_profile(self, row):
+        self.local.add_profile(row)
+        self._export(row[0], "add_profile", row)
+
+    def save_entries(self, username, changes, totals, target=None):
+        self.local.save_entries(username, changes, totals, target)
+        changes = [(dict(before) if before else None, dict(after) if after else None) for before, after in changes]
+        self._export(username, "save_entries", username, changes, totals, target)
+
+    def save_targets(self, date_str, targets):
+        done = self.local.save_targets(date_str, targets)
+        self._export(None, "save_targets", date_str, dict(targets))
+        return done
+
+    def import_log(self, username, entries):
+        # Ids are given here so both stores file the entries under the same ones
+        entries = [{**e, 'entry_id': e.get('entry_id') or new_entry_id()} for e in entries]
+        self.local.import_log(username, entries)
+        self._export(username, "import_log", username, entries, False)
+
+    def import_profiles(self, rows):
+        self.local.import_profiles(rows)
+        self._export(None, "import_profiles", rows)
+
+    def reimport(self):
+        return self.local.load_dump(self.remote.dump())
@@ -0,0 +1,107 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from accounts import PROFILE_HEADER
+
+# Daily calorie targets: Mifflin-St Jeor BMR times the activity factor (TDEE)
+# plus the summed adjustments of the user's goals, never below MIN_TARGET.
+# One profile (login, profile save) is plain float math; every user's latest
+# profile for the admin recompute is one vectorized pass, cached per (profile
+# version, goal table). Both share bmr() and the per-value helpers.
+
+GOAL_DB = {
+    "Maintain Current Weight": 0,
+    "Lose Weight (Slow)": -250, "Lose Weight (Standard)": -500, "Lose Weight (Aggressive)": -750,
+    "Build Muscle (Lean)": 300, "Build Muscle (Bulk)": 600,
+    "Marathon Training": 800, "Triathlon Training": 700, "HIIT Performance": 450,
+    "Diabetes (Low Sugar)": -200, "Heart Health": -100, "PCOS": -250, "Pregnancy": 350
+}
+
+ACTIVITY_FACTORS = {
+    "Sedentary (Office Job)": 1.2, "Lightly Active (1-3 days)": 1.375, "Moderately Active (3-5 days)": 1.55,
+    "Very Active (6-7 days)": 1.725, "Athlete (2x per day)": 1.9
+}
+ACTIVITY_LEVELS = list(ACTIVITY_FACTORS)
+
+DEFAULT_GOALS = ['Maintain Current Weight']
+MIN_TARGET = 1200
+TARGET_COLUMNS = ['username', 'bmr', 'tdee', 'adjustment', 'target']
+
+
+def activity_factor(activity):
+    # Current levels are a dict hit; older values match on the level's name
+    if activity in ACTIVITY_FACTORS: return ACTIVITY_FACTORS[activity]
+    return next((f for lvl, f in ACTIVITY_FACTORS.items() if lvl.split(' (')[0] in str(activity)), 1.2)
+
+
+def parse_goals(value, goal_db=GOAL_DB):
+    # "Goal A, Goal B" or a list -> the known goals, or DEFAULT_GOALS
+    if isinstance(value, str): value = value.split(',')
+    return [g.strip() for g in value or [] if str(g).strip() in goal_db] or list(DEFAULT_GOALS)
+
+
+def goal_version(goal_db=GOAL_DB):
+    return tuple(sorted(goal_db.items()))
+
+
+def bmr(weight, height, age, offset):
+    # Mifflin-St Jeor; offset is +5 for men and -161 for women. Floats or arrays
+    return 10 * weight + 6.25 * height - 5 * age + offset
+
+
+def goal_adjustment(goals, goal_db=GOAL_DB):
+    return sum(goal_db[g] for g in parse_goals(goals, goal_db))
+
+
+def _per_value(series, fn):
+    # fn() once per distinct value instead of once per row
+    return series.map({v: fn(v) for v in series.unique()}).to_numpy(dtype=float)
+
+
+def compute_targets(profiles, goal_db=GOAL_DB):
+    # Profile records (PROFILE_HEADER keys) -> DataFrame of TARGET_COLUMNS,
+    # one row per record; records with missing or non-numeric measurements are dropped
+    df = pd.DataFrame(list(profiles), columns=PROFILE_HEADER)
+    weight, height, age = (pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) for c in ('weight', 'height', 'age'))
+    base = bmr(weight, height, age, np.where(df['gender'].to_numpy() == 'Male', 5, -161))
+    tdee = base * _per_value(df['activity'].astype(str), activity_factor)
+    adjustment = _per_value(df['goal'].astype(str), lambda v: goal_adjustment(v, goal_db))
+    out = pd.DataFrame({'username': df['username'].astype(str), 'bmr': base, 'tdee': tdee, 'adjustment': adjustment,
+                        'target': np.maximum(np.trunc(tdee + adjustment), MIN_TARGET)})
+    out = out[np.isfinite(tdee)]
+    return out.astype({'target': int}).reset_index(drop=True)
+
+
+def profile_target(profile, goal_db=GOAL_DB):
+    # One profile ('goal' as a string or list) -> daily target in kcal; the
+    # same result as its compute_targets() row, without building a DataFrame
+    try: weight, height, age = (float(profile[k]) for k in ('weight', 'height', 'age'))
+    except (KeyError, TypeError, ValueError): return 2000
+    tdee = bmr(weight, height, age, 5 if profile.get('gender') == 'Male' else -161) * activity_factor(str(profile.get('activity')))
+    if not math.isfinite(tdee): return 2000
+    return max(int(tdee + goal_adjustment(profile.get('goal'), goal_db)), MIN_TARGET)
+
+
+class TargetTable:
+    # Process-wide targets of every user's latest profile. Rebuilt only when
+    # a profile was added (repo.profiles_version()) or the goal table changed.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.frame = None
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, repo, goal_db=GOAL_DB):
+        key = (repo.profiles_version(), goal_version(goal_db))
+        with self.lock:
+            if key != self.key:
+                self.frame = compute_targets(repo.latest_profiles(), goal_db)
+                self.key = key
+                self.builds += 1
+            else:
+                self.hits += 1
+            return self.frame
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from accounts import ProfileView, UserDirectory
+from fake_sheets import demo_client
+from rollups import DailyRollup
+from sheet_sync import LogSync, WriteBehind
+from storage import MirroredRepository, SheetsRepository, SQLiteRepository
+
+# Everything runs against fake_sheets; the write-behind queues use a long
+# interval, so tests decide when writes land (queue.drain()).
+
+
+def entry(entry_id, date="2026-10-01", name="Apple", cal=95, **kw):
+    return {'date': date, 'name': name, 'cal': cal, 'type': 'Manual', 'amount': 1, 'unit': 'Piece', 'entry_id': entry_id, **kw}
+
+
+def sheets_repo(client):
+    book = client.open("NutriTrack_Data")
+    handles = {}
+    def tab(name, cols=None):
+        if name not in handles:
+            try: handles[name] = book.worksheet(name)
+            except Exception:
+                if not cols: return None
+                handles[name] = book.add_worksheet(name, rows=1000, cols=cols)
+        return handles[name]
+    return SheetsRepository(tab, WriteBehind(interval=3600, backoff=0.01), UserDirectory(), ProfileView(), LogSync(), DailyRollup())
+
+
+@pytest.fixture
+def client():
+    return demo_client(users=[("alice", "pw", "Alice")])
+
+
+@pytest.fixture
+def book(client):
+    return client.open("NutriTrack_Data")
+
+
+@pytest.fixture(params=["sqlite", "sheets", "mirrored"])
+def repo(request, client):
+    if request.param == "sqlite": return SQLiteRepository(":memory:")
+    if request.param == "sheets": return sheets_repo(client)
+    return MirroredRepository(SQLiteRepository(":memory:"), sheets_repo(client))
+
+
+def settle(repo):
+    # Lets queued Sheets writes land
+    queue = getattr(repo, 'queue', None) or getattr(getattr(repo, 'remote', None), 'queue', None)
+    if queue: queue.drain()
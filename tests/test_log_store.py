@@ -0,0 +1,42 @@
+from conftest import entry
+from log_store import LogStore, editor_changes
+
+DAY = "2026-10-01"
+
+
+def day():
+    return [entry("a"), entry("b", name="Run", cal=300, type='Exercise')]
+
+
+def test_edits_keep_the_entry_and_its_id():
+    entries = day()
+    changes = editor_changes(entries, {'edited_rows': {"1": {'cal': 250}}}, DAY)
+    assert changes == [(entries[1], {**entries[1], 'cal': 250})]
+
+
+def test_cleared_cells_and_unchanged_edits():
+    entries = day()
+    assert editor_changes(entries, {'edited_rows': {0: {'cal': None, 'amount': float('nan')}}}, DAY) == []
+    assert editor_changes(entries, {'edited_rows': {0: {'cal': 95}}}, DAY) == []
+
+
+def test_deleted_rows_win_over_edits_and_bad_positions_are_ignored():
+    entries = day()
+    delta = {'edited_rows': {0: {'cal': 1}, 7: {'cal': 1}}, 'deleted_rows': [0, 9]}
+    assert editor_changes(entries, delta, DAY) == [(entries[0], None)]
+
+
+def test_added_rows_get_an_id_and_the_day():
+    delta = {'added_rows': [{'name': "Tea", 'cal': 5}, {'name': "  "}, {'cal': 10}]}
+    (before, after), = editor_changes([], delta, DAY)
+    assert before is None
+    assert (after['name'], after['cal'], after['date'], after['type']) == ("Tea", 5, DAY, 'Manual')
+    assert after['entry_id']
+
+
+def test_store_applies_changes_in_place():
+    store = LogStore("alice", day())
+    a, b = store.day(DAY)
+    store.apply([(a, {**a, 'cal': 100}), (b, None), (None, entry("c", name="Tea", cal=5))])
+    assert [(e['entry_id'], e['cal']) for e in store.day(DAY)] == [("a", 100), ("c", 5)]
+    assert store.totals(DAY)['food'] == 105 and store.totals(DAY)['exercise'] == 0
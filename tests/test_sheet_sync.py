@@ -0,0 +1,77 @@
+from conftest import entry
+from fake_sheets import FakeAPIError
+from sheet_sync import LogSync, NotReady, is_retryable, row_to_entry
+
+DAY = ("2026-10-01", "2026-10-01")
+
+
+def logged(sheet):
+    return [(e['username'], e['date'], e['name'], e['cal'], e['entry_id']) for e in map(row_to_entry, sheet.get_all_values()[1:])]
+
+
+def test_apply_writes_only_the_changed_rows(book):
+    log, sync = book.worksheet("Sheet1"), LogSync()
+    sync.apply(log, {("alice", "a"): (None, entry("a")), ("alice", "b"): (None, entry("b", name="Tea", cal=5))})
+    sync.apply(log, {("alice", "a"): (entry("a"), entry("a", cal=100)), ("alice", "b"): (entry("b"), None)})
+    assert logged(log) == [("alice", "2026-10-01", "Apple", 100, "a")]
+    assert [r[-1] for r in sync.read(log, "alice", *DAY)["2026-10-01"]] == ["a"]
+
+
+def test_delete_moves_later_rows_up(book):
+    log, sync = book.worksheet("Sheet1"), LogSync()
+    sync.apply(log, {("alice", "a"): (None, entry("a")), ("bob", "b"): (None, entry("b")), ("alice", "c"): (None, entry("c"))})
+    sync.apply(log, {("alice", "a"): (entry("a"), None)})
+    sync.apply(log, {("alice", "c"): (entry("c"), entry("c", cal=1))})
+    assert logged(log) == [("bob", "2026-10-01", "Apple", 95, "b"), ("alice", "2026-10-01", "Apple", 1, "c")]
+
+
+def test_rows_without_an_id_are_matched_by_content(book):
+    # Written before entry ids existed; the sheet holds "80" for 80.0
+    log, sync = book.worksheet("Sheet1"), LogSync()
+    log.append_row(["2026-10-01", "Apple", "80", "Manual", "1", "Piece", "alice"])
+    old = {**entry(""), 'cal': 80.0, 'amount': 1.0}
+    sync.apply(log, {("alice", "x"): (old, entry("x", cal=90))})
+    assert logged(log) == [("alice", "2026-10-01", "Apple", 90, "x")]
+
+
+def test_instances_see_rows_appended_by_each_other(book):
+    # Two server processes: each append lands after the other's rows
+    log, a, b = book.worksheet("Sheet1"), LogSync(), LogSync()
+    a.read(log, "alice", *DAY)
+    b.read(log, "bob", *DAY)
+    b.apply(log, {("bob", "b1"): (None, entry("b1"))})
+    a.apply(log, {("alice", "a1"): (None, entry("a1"))})
+    assert [r[-1] for r in a.read(log, "bob", *DAY)["2026-10-01"]] == ["b1"]
+    assert [r[-1] for r in a.read(log, "alice", *DAY)["2026-10-01"]] == ["a1"]
+
+
+def test_an_entry_whose_date_changed_keeps_one_row(book):
+    log, sync = book.worksheet("Sheet1"), LogSync()
+    first, moved = entry("x1"), entry("x1", date="2026-10-02")
+    sync.apply(log, {("alice", "x1"): (first, first)})
+    assert sync.apply(log, {("alice", "x1"): (moved, moved)}) == [("alice", "2026-10-01")]
+    assert logged(log) == [("alice", "2026-10-02", "Apple", 95, "x1")]
+    # Also when the index was seeded from the sheet by another process
+    back = entry("x1", date="2026-09-30")
+    LogSync().apply(log, {("alice", "x1"): (back, back)})
+    assert logged(log) == [("alice", "2026-09-30", "Apple", 95, "x1")]
+
+
+def test_uncached_read_leaves_the_index_without_contents(book):
+    log, writer = book.worksheet("Sheet1"), LogSync()
+    writer.apply(log, {("alice", f"e{i}"): (None, entry(f"e{i}")) for i in range(3)})
+    sync = LogSync()
+    assert len(sync.read(log, "alice", *DAY, cache=False)["2026-10-01"]) == 3
+    assert all(s[1] is None for s in sync.index["alice"]["2026-10-01"])
+
+
+def test_retryable_errors():
+    def err(code, op=None):
+        e = FakeAPIError(code)
+        e.op = op
+        return e
+    assert is_retryable(err(429, 'append_rows'))
+    assert is_retryable(err(503, 'ws.get'))
+    assert not is_retryable(err(503, 'append_rows'))  # may have landed; resending would duplicate rows
+    assert not is_retryable(err(400))
+    assert is_retryable(NotReady())
@@ -0,0 +1,83 @@
+from accounts import ProfileView, UserDirectory
+from conftest import entry, settle, sheets_repo
+from rollups import ROLLUP_HEADER, DailyRollup
+from storage import MirroredRepository, SQLiteRepository
+from targets import ACTIVITY_LEVELS, profile_target
+
+
+def profile(date, weight=70, goal="Maintain Current Weight"):
+    return ["alice", date, weight, 175, 30, "Male", ACTIVITY_LEVELS[0], goal]
+
+
+def test_latest_profile_is_the_newest_date(repo):
+    repo.add_profile(profile("2026-10-17"))
+    repo.import_profiles([profile("2019-01-01", 150, "Build Muscle (Bulk)"), profile("2019-02-01", 150, "Build Muscle (Bulk)")])
+    settle(repo)
+    assert repo.latest_profile("alice")['date'] == "2026-10-17"
+    assert [p['date'] for p in repo.latest_profiles()] == ["2026-10-17"]
+    assert [p['date'] for p in repo.profile_history("alice")] == ["2019-01-01", "2019-02-01", "2026-10-17"]
+    assert profile_target(repo.latest_profile("alice")) == profile_target(dict(zip(['username', 'date', 'weight', 'height', 'age', 'gender', 'activity', 'goal'], profile("2026-10-17"))))
+
+
+def test_rebuilding_the_rollups_keeps_targets(repo):
+    repo.save_entries("alice", [(None, entry("a"))], {"2026-10-01": {'food': 95}})
+    repo.save_targets("2026-10-01", {"alice": 2100, "bob": 1900})
+    settle(repo)
+    repo.rebuild_daily()
+    assert repo.daily_frame("alice")[['food', 'target']].values.tolist() == [[95, 2100]]
+    assert repo.daily_frame("bob")[['food', 'target']].values.tolist() == [[0, 1900]]
+
+
+def test_saving_before_the_daily_tab_was_read_keeps_its_target(client):
+    repo = sheets_repo(client)
+    repo.save_targets("2026-10-01", {"alice": 2100})
+    settle(repo)
+    repo.rollups = DailyRollup()  # a restarted process
+    repo.save_entries("alice", [(None, entry("a"))], {"2026-10-01": {'food': 95}})
+    settle(repo)
+    assert repo.dump()['daily'][1][-1] == "2100"
+
+
+def test_mirrored_approval_reaches_the_sheet(client):
+    client.open("NutriTrack_Data").worksheet("users").append_row(["newcomer", "pw", "N", "2026-10-17", "pending"])
+    remote = sheets_repo(client)
+    repo = MirroredRepository(SQLiteRepository(":memory:"), remote)
+    repo.reimport()
+    repo.add_user(["late", "pw", "L", "2026-10-17", "pending"])
+    assert sorted(repo.approve_users(["newcomer", "late"])) == ["late", "newcomer"]
+    settle(repo)
+    status = {r[0]: r[4] for r in remote.dump()['users'][1:]}
+    assert status["newcomer"] == status["late"] == "approved"
+
+
+def test_directories_see_users_registered_by_other_processes(book):
+    users, here, there = book.worksheet("users"), UserDirectory(min_refresh=0), UserDirectory()
+    here.lookup(users, "alice")
+    there.lookup(users, "alice")
+    for d, name in ((there, "bob"), (here, "carol")):
+        row = [name, "pw", name.title(), "2026-10-17", "pending"]
+        d.add_pending(row)
+        d.append(users, [row])
+    assert here.lookup(users, "bob")['name'] == "Bob"
+    assert here.approve(users, ["bob", "carol"]) == ["bob", "carol"]
+
+
+def test_profile_views_see_rows_saved_by_other_processes(book):
+    sheet, here, there = book.worksheet("profiles"), ProfileView(), ProfileView()
+    here.latest(sheet, "alice")
+    there.latest(sheet, "alice")
+    for view, name in ((there, "bob"), (here, "alice")):
+        row = [name] + profile("2026-10-17")[1:]
+        view.add_pending(sheet, row)
+        view.append(sheet, [row])
+    here.ttl = 0
+    assert here.latest(sheet, "bob") is not None and len(here.user_history(sheet, "alice")) == 1
+
+
+def test_rollups_see_rows_written_by_other_processes(book):
+    sheet, here, there = book.add_worksheet("daily", rows=[ROLLUP_HEADER]), DailyRollup(), DailyRollup()
+    here.user_frame(sheet, "alice")
+    for rollup, name in ((there, "bob"), (here, "alice")):
+        rollup.put(name, "2026-10-01", {'food': 1})
+        rollup.write(sheet, [(name, "2026-10-01")])
+    assert len(here.user_frame(sheet, "bob")) == 1 and len(sheet.get_all_values()) == 3
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from catalogue import DEFAULT_EXERCISES, DEFAULT_FOODS, Catalogue
+from conftest import settle
+from targets import ACTIVITY_LEVELS, GOAL_DB
+from transfer import LOG_FIELDS, PROFILE_FIELDS, export_blocks, import_stream, read_records, validate_log, validate_profiles
+
+FOODS, EXERCISES = Catalogue.from_records(DEFAULT_FOODS), Catalogue.from_records(DEFAULT_EXERCISES)
+
+
+def import_log(repo, text, fmt='csv', chunk_rows=1000):
+    validate = lambda recs, first: validate_log(recs, FOODS, EXERCISES, first)
+    res = import_stream(io.StringIO(text), fmt, validate, lambda rows: repo.import_log("alice", rows), chunk_rows)
+    settle(repo)
+    return res
+
+
+def export(records, fields, fmt):
+    return "".join(export_blocks(records, fields, fmt, chunk_rows=2))
+
+
+def test_validation_fills_calories_and_reports_bad_records():
+    entries, errors = validate_log([
+        {'date': "2026-10-01", 'name': "Apple", 'amount': "2"},
+        {'date': "2026-10-01", 'name': "Cycling"},
+        {'date': "01/10/2026", 'name': "Apple"},
+        {'date': "2026-10-01", 'name': "Unknown dish"},
+        None,
+    ], FOODS, EXERCISES, first=5)
+    apple = FOODS.get("Apple", 'cal_per_unit')
+    assert [(e['name'], e['type'], e['cal']) for e in entries] == [
+        ("Apple", 'Manual', round(apple * 2, 1)), ("Cycling", 'Exercise', round(EXERCISES.get("Cycling", 'cal_per_min') * 30, 1))
+    ]
+    assert [n for n, _ in errors] == [7, 8, 9]
+
+
+def test_import_writes_one_chunk_at_a_time():
+    chunks = []
+    text = "date,food,qty\n" + "2026-10-01,Apple,1\n" * 5 + "bad,Apple,1\n"
+    validate = lambda recs, first: validate_log(recs, FOODS, EXERCISES, first)
+    res = import_stream(io.StringIO(text), 'csv', validate, chunks.append, chunk_rows=2)
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert (res['imported'], res['skipped'], res['errors'][0][0]) == (5, 1, 6)
+
+
+def test_json_arrays_and_lines_are_read_the_same():
+    array = '[{"date": "2026-10-01", "name": "Apple"}, {"date": "2026-10-02", "name": "Tea"}]'
+    lines = '{"date": "2026-10-01", "name": "Apple"}\n{"date": "2026-10-02", "name": "Tea"}\n'
+    assert list(read_records(io.StringIO(array), 'json')) == list(read_records(io.StringIO(lines), 'json'))
+    with pytest.raises(ValueError):
+        list(read_records(io.StringIO('[{"date": '), 'json'))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_reimporting_an_export_updates_instead_of_duplicating(repo, fmt):
+    import_log(repo, "date,food,qty\n2026-10-01,Apple,1\n2026-10-02,Apple,2\n2026-10-02,Cycling,20\n")
+    first = list(repo.export_log("alice"))
+    text = export(first, LOG_FIELDS, fmt)
+    import_log(repo, text, fmt)
+    import_log(repo, text, fmt)
+    again = list(repo.export_log("alice"))
+    assert [(e['date'], e['name'], e['entry_id']) for e in again] == [(e['date'], e['name'], e['entry_id']) for e in first]
+    assert len(again) == 3 and all(e['entry_id'] for e in again)
+
+
+def test_reimport_with_a_changed_date_moves_the_entry(repo):
+    import_log(repo, "date,food,qty\n2026-10-01,Apple,1\n")
+    text = export(repo.export_log("alice"), LOG_FIELDS, 'csv').replace("2026-10-01", "2026-10-02")
+    import_log(repo, text)
+    assert [e['date'] for e in repo.export_log("alice")] == ["2026-10-02"]
+    if hasattr(repo, 'remote'): assert [e['date'] for e in repo.remote.export_log("alice")] == ["2026-10-02"]
+
+
+def test_profile_history_round_trip(repo):
+    rows = [["alice", "2025-01-01", 80.5, 180, 40, "Male", ACTIVITY_LEVELS[1], "Heart Health"],
+            ["alice", "2026-01-01", 78.0, 180, 41, "Male", ACTIVITY_LEVELS[2], "Maintain Current Weight"]]
+    repo.import_profiles(rows)
+    settle(repo)
+    text = export(repo.profile_history("alice"), PROFILE_FIELDS, 'json')
+    parsed, errors = validate_profiles(read_records(io.StringIO(text), 'json'), "alice", GOAL_DB, ACTIVITY_LEVELS)
+    assert errors == [] and parsed == rows
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from fake_sheets import FakeAPIError
+from sheet_sync import WriteBehind, merge_append, merge_changes
+
+
+def queue(**kw):
+    return WriteBehind(**{'interval': 3600, 'backoff': 0.01, **kw})
+
+
+def test_writes_under_one_key_go_out_as_one_call():
+    q, calls = queue(), []
+    q.submit("alice", "rows", calls.append, [1], merge_append)
+    q.submit("bob", "rows", calls.append, [2], merge_append)
+    assert q.pending_for("alice") == 1 and q.pending_total() == 2
+    q.drain()
+    assert calls == [[1, 2]] and q.pending_total() == 0
+
+
+def test_quota_errors_are_retried():
+    q, calls = queue(), []
+    def write(payload):
+        calls.append(list(payload))
+        if len(calls) == 1: raise FakeAPIError(429, "Quota exceeded")
+    q.submit(None, "rows", write, [1], merge_append)
+    q.drain()
+    assert calls == [[1], [1]]
+
+
+def test_writes_queued_during_a_retry_merge_into_it():
+    q, calls = queue(), []
+    def write(payload):
+        calls.append(list(payload))
+        if len(calls) == 1:
+            q.submit(None, "rows", write, [2], merge_append)
+            raise FakeAPIError(429)
+    q.submit(None, "rows", write, [1], merge_append)
+    q.drain()
+    assert calls == [[1], [1, 2]]
+
+
+def test_other_errors_drop_the_job(capsys):
+    q, calls = queue(), []
+    def write(payload):
+        calls.append(payload)
+        raise FakeAPIError(400, "Bad request")
+    q.submit(None, "rows", write, [1], merge_append)
+    q.drain()
+    assert len(calls) == 1 and q.pending_total() == 0
+    assert "Sync Error (rows)" in capsys.readouterr().out
+
+
+def test_gives_up_after_max_attempts(capsys):
+    q, calls = queue(max_attempts=3), []
+    def write(payload):
+        calls.append(payload)
+        raise FakeAPIError(429)
+    q.submit(None, "rows", write, [1], merge_append)
+    q.drain()
+    assert len(calls) == 3 and q.pending_total() == 0
+
+
+def test_drain_waits_for_jobs_queued_by_jobs():
+    q, calls = queue(), []
+    q.submit(None, "export", lambda _: q.submit(None, "rows", calls.append, ["spawned"], merge_append), [1], merge_append)
+    q.drain()
+    assert calls == [["spawned"]]
+
+
+def test_drain_from_a_job_is_refused():
+    q, errors = queue(), []
+    def job(_):
+        try: q.drain()
+        except RuntimeError as e: errors.append(e)
+    q.submit(None, "rows", job, [1], merge_append)
+    q.drain()
+    assert len(errors) == 1
+
+
+def test_kick_flushes_before_the_interval():
+    q, done = queue(interval=30), threading.Event()
+    q.submit(None, "rows", lambda _: done.set(), [1], merge_append)
+    time.sleep(0.1)  # let the flusher start waiting
+    q.kick()
+    assert done.wait(2)
+
+
+@pytest.mark.parametrize("old, new, merged", [
+    ({"a": (None, 1)}, {"a": (1, 2)}, {"a": (None, 2)}),   # added then edited: still an add
+    ({"a": (None, 1)}, {"a": (1, None)}, {}),              # added then deleted: nothing to write
+    ({"a": (0, 1)}, {"a": (1, None)}, {"a": (0, None)}),   # the oldest before is kept
+    ({"a": (0, 1)}, {"b": (None, 5)}, {"a": (0, 1), "b": (None, 5)}),
+])
+def test_merge_changes(old, new, merged):
+    assert merge_changes(old, new) == merged
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+
+from metrics import QUOTA_PER_MINUTE, WRITE_METHODS
+from proxy import Proxies
+from sheet_sync import is_retryable
+
+# Quota-aware wrapper around the shared gspread client. Every call takes a
+# token from the read or write bucket, identical reads in flight at the same
+# time share one request, callers with a user waiting go ahead of background
+# work, and 429/5xx responses are retried with exponential backoff and jitter.
+
+BACKGROUND_THREADS = {"write-behind"}
+READ_METHODS = {'get_all_values', 'get_all_records', 'get', 'batch_get', 'row_values', 'col_values', 'worksheet', 'worksheets', 'open'}
+
+
+class TokenBucket:
+    # `burst` tokens up front, refilled so no `window` seconds exceed `per_minute`
+    def __init__(self, per_minute, burst=10, window=60.0):
+        self.capacity = min(burst, per_minute)
+        self.rate = max(per_minute - self.capacity, 1) / window
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+        self.waiting = 0  # foreground callers queued for a token
+        self.cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def acquire(self, foreground=True):
+        # Background callers only take a token when no foreground caller is waiting
+        with self.cond:
+            if foreground: self.waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    if self.tokens >= 1 and (foreground or not self.waiting):
+                        self.tokens -= 1
+                        return
+                    self.cond.wait(max((1 - self.tokens) / self.rate, 0.01))
+            finally:
+                if foreground:
+                    self.waiting -= 1
+                    self.cond.notify_all()
+
+    def drain(self):
+        # After a 429 the server's window is full; stop everyone, not just the caller
+        with self.cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def retry_after(err):
+    # Seconds the server asked us to wait, if it said
+    try: return float(err.response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError): return 0.0
+
+
+def _share(result):
+    # Followers of a coalesced read get their own outer containers to mutate
+    if isinstance(result, list): return [list(r) if isinstance(r, list) else dict(r) if isinstance(r, dict) else r for r in result]
+    return result
+
+
+class Throttle:
+    def __init__(self, quota=QUOTA_PER_MINUTE, burst=10, max_attempts=5, backoff=0.5, max_backoff=32.0, window=60.0):
+        self.buckets = {kind: TokenBucket(n, burst, window) for kind, n in quota.items()}
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.flights = {}   # read key -> _Flight in progress
+        self.proxies = Proxies(self.call)
+        self.coalesced = 0
+        self.retries = 0
+
+    def wrap(self, client):
+        return self.proxies.wrap(client)
+
+    def call(self, key, method, fn, args, kwargs):
+        op = f"{key[0]}.{method}" if key[0] == "spreadsheet" else method
+        if method not in READ_METHODS: return self._attempt('write' if method in WRITE_METHODS else 'read', op, fn, args, kwargs)
+        key = key + (method, repr(args), repr(sorted(kwargs.items())))
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader: flight = self.flights[key] = _Flight()
+            else: self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None: raise flight.error
+            return _share(flight.result)
+        try:
+            flight.result = self._attempt('read', op, fn, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock: self.flights.pop(key, None)
+            flight.done.set()
+
+    def _attempt(self, kind, op, fn, args, kwargs):
+        # Session threads have a user waiting; the write-behind flusher can wait
+        bucket, foreground = self.buckets[kind], threading.current_thread().name not in BACKGROUND_THREADS
+        for attempt in range(self.max_attempts):
+            bucket.acquire(foreground)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                # Tagged so the write-behind queue judges the failure the same way
+                e.op = op
+                if not is_retryable(e) or attempt == self.max_attempts - 1: raise
+                if getattr(e, 'code', None) == 429: bucket.drain()
+                with self.lock: self.retries += 1
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                time.sleep(max(delay, retry_after(e)))
+
+    def stats(self):
+        with self.lock:
+            return {'coalesced': self.coalesced, 'retries': self.retries,
+                    **{f"{kind} tokens": int(b.tokens) for kind, b in self.buckets.items()}}
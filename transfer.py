@@ -0,0 +1,185 @@
+import csv
+import datetime
+import io
+import json
+import tempfile
+from itertools import islice
+
+from accounts import PROFILE_HEADER
+from nutrition import MACROS
+
+# Streaming import/export of a user's food log and profile history as CSV or
+# JSON. Files are parsed record by record, validated and written a chunk at a
+# time, so a file with years of entries needs one chunk of memory and one
+# batched write per chunk rather than a save per entry.
+
+CHUNK_ROWS = 1000
+LOG_FIELDS = ['date', 'name', 'cal', 'type', 'amount', 'unit'] + MACROS + ['entry_id']
+PROFILE_FIELDS = PROFILE_HEADER[1:]
+MAX_ERRORS = 50
+
+# Column names other trackers commonly use
+ALIASES = {
+    'food': 'name', 'item': 'name', 'exercise': 'name', 'description': 'name',
+    'calories': 'cal', 'kcal': 'cal', 'energy': 'cal',
+    'qty': 'amount', 'quantity': 'amount', 'servings': 'amount', 'minutes': 'amount', 'duration': 'amount',
+    'goals': 'goal', 'sex': 'gender', 'day': 'date',
+    'protein (g)': 'protein', 'carbohydrates': 'carbs', 'carbs (g)': 'carbs', 'fat (g)': 'fat',
+    'fiber (g)': 'fiber', 'fibre': 'fiber', 'sugar (g)': 'sugar', 'sugars': 'sugar'
+}
+
+
+def file_format(filename):
+    return 'json' if filename.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+
+
+# --- Reading ---
+
+def read_records(f, fmt):
+    # f: text file object -> dicts with normalised keys, one at a time
+    rows = csv.DictReader(f) if fmt == 'csv' else _json_objects(f)
+    for rec in rows:
+        if isinstance(rec, dict):
+            yield {ALIASES.get(k, k): v for k, v in ((str(k).strip().lower(), v) for k, v in rec.items() if k is not None)}
+        else:
+            yield None  # counted as an invalid record
+
+
+def _json_objects(f, block=1 << 16):
+    # Objects of a top-level JSON array, or JSON Lines, decoded as the text
+    # arrives instead of json.load()-ing the whole file
+    decoder, buf, eof = json.JSONDecoder(), "", False
+    while True:
+        buf = buf.lstrip(" \t\r\n,[]")
+        if not buf:
+            if eof: return
+            more = f.read(block)
+            eof, buf = not more, more
+            continue
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            more = "" if eof else f.read(block)
+            if not more: raise ValueError(f"Invalid JSON near: {buf[:40]!r}")
+            buf += more
+            continue
+        yield obj
+        buf = buf[end:]
+
+
+def chunked(records, size=CHUNK_ROWS):
+    it = iter(records)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+# --- Validation ---
+
+def _float(value, default=None):
+    if value is None or str(value).strip() == '': return default
+    try: v = float(str(value).strip())
+    except ValueError: return None
+    return v if v == v else None
+
+
+def _date(value):
+    try: return str(datetime.date.fromisoformat(str(value).strip()[:10]))
+    except ValueError: return None
+
+
+def validate_log(records, foods, exercises, first=1):
+    # -> (entries, errors). Types are inferred from the catalogues when missing,
+    # and blank calories/macros are filled from them; `first` numbers records
+    entries, errors = [], []
+    for n, rec in enumerate(records, start=first):
+        if rec is None:
+            errors.append((n, "not an object"))
+            continue
+        date, name = _date(rec.get('date')), str(rec.get('name') or '').strip()
+        if not date or not name:
+            errors.append((n, "needs a date (YYYY-MM-DD) and a name"))
+            continue
+        kind = str(rec.get('type') or '').strip().lower()
+        if kind not in ('manual', 'food', 'exercise'): kind = 'exercise' if name in exercises and name not in foods else 'manual'
+        exercise = kind == 'exercise'
+        amount = _float(rec.get('amount'), 30.0 if exercise else 1.0)
+        cal = _float(rec.get('cal'), -1.0)
+        if cal == -1.0:
+            rate = exercises.get(name, 'cal_per_min') if exercise else foods.get(name, 'cal_per_unit')
+            cal = None if rate is None or amount is None else round(float(rate) * amount, 1)
+        if amount is None or cal is None or not 0 <= cal <= 20000:
+            errors.append((n, f"'{name}': calories missing or invalid and not in the {'exercise' if exercise else 'food'} list"))
+            continue
+        entry = {
+            'date': date, 'name': name, 'cal': cal, 'type': 'Exercise' if exercise else 'Manual', 'amount': amount,
+            'unit': str(rec.get('unit') or ('mins' if exercise else foods.get(name, 'unit', 'Serving'))),
+            'entry_id': str(rec.get('entry_id') or '').strip()  # kept, so re-imports update rather than duplicate
+        }
+        for m in MACROS:
+            given = _float(rec.get(m))
+            entry[m] = 0.0 if exercise else given if given is not None else round(float(foods.get(name, m, 0)) * amount, 1)
+        entries.append(entry)
+    return entries, errors
+
+
+def validate_profiles(records, username, goals, activities, first=1):
+    # -> (rows ordered like PROFILE_HEADER, errors); unknown goals are dropped
+    rows, errors = [], []
+    for n, rec in enumerate(records, start=first):
+        if rec is None:
+            errors.append((n, "not an object"))
+            continue
+        date = _date(rec.get('date'))
+        w, h, a = _float(rec.get('weight')), _float(rec.get('height')), _float(rec.get('age'))
+        gender = str(rec.get('gender') or '').strip().title()
+        act = str(rec.get('activity') or '').strip().lower()
+        activity = next((lvl for lvl in activities if act and lvl.lower().startswith(act.split(' (')[0])), None)
+        if not date or w is None or h is None or a is None or not (20 <= w <= 400 and 50 <= h <= 260 and 5 <= a <= 120):
+            errors.append((n, "needs a date and a plausible weight (kg), height (cm) and age"))
+            continue
+        if gender not in ('Male', 'Female') or activity is None:
+            errors.append((n, f"unknown gender '{gender}' or activity '{rec.get('activity')}'"))
+            continue
+        picked = [g.strip() for g in str(rec.get('goal') or '').split(',') if g.strip() in goals]
+        rows.append([username, date, w, h, int(a), gender, activity, ", ".join(picked or ['Maintain Current Weight'])])
+    return rows, errors
+
+
+def import_stream(f, fmt, validate, write, chunk_rows=CHUNK_ROWS):
+    # Reads, validates and writes one chunk at a time.
+    # validate(records, first) -> (rows, errors); write(rows) stores one chunk
+    done, skipped, errors, first = 0, 0, [], 1
+    for chunk in chunked(read_records(f, fmt), chunk_rows):
+        rows, errs = validate(chunk, first)
+        if rows: write(rows)
+        done, skipped, first = done + len(rows), skipped + len(errs), first + len(chunk)
+        errors += errs[:MAX_ERRORS - len(errors)]
+    return {'imported': done, 'skipped': skipped, 'errors': errors}
+
+
+# --- Writing ---
+
+def export_blocks(records, fields, fmt, chunk_rows=CHUNK_ROWS):
+    # dicts -> text blocks of up to chunk_rows records each
+    first = True
+    for chunk in chunked(records, chunk_rows):
+        out = io.StringIO()
+        if fmt == 'csv':
+            w = csv.DictWriter(out, fields, extrasaction='ignore', lineterminator='\n')
+            if first: w.writeheader()
+            w.writerows(chunk)
+        else:
+            out.write("[\n" if first else ",\n")
+            out.write(",\n".join(json.dumps({k: r.get(k) for k in fields}) for r in chunk))
+        first = False
+        yield out.getvalue()
+    if fmt == 'csv' and first: yield ",".join(fields) + "\n"
+    if fmt == 'json': yield "[]\n" if first else "\n]\n"
+
+
+def spool(blocks, max_size=1 << 20):
+    # Text blocks -> a binary file object, kept in memory only while small
+    f = tempfile.SpooledTemporaryFile(max_size=max_size)
+    for block in blocks: f.write(block.encode('utf-8'))
+    f.seek(0)
+    return f